@@ -6,7 +6,8 @@ from .weather_collector import WeatherCollector
 from .events_collector import EventsCollector
 from .news_collector import NewsCollector
 from .trends_collector import TrendsCollector
-from .rate_limiter import RateLimiter, RateLimitConfig
+from .rate_limiter import RateLimiter, RateLimitConfig, AdaptiveConcurrencyLimiter
+from .circuit_breaker import CircuitBreaker, CircuitOpenError
 
 __all__ = [
     "BaseCollector",
@@ -17,5 +18,8 @@ __all__ = [
     "TrendsCollector",
     "RateLimiter",
     "RateLimitConfig",
+    "AdaptiveConcurrencyLimiter",
+    "CircuitBreaker",
+    "CircuitOpenError",
 ]
 
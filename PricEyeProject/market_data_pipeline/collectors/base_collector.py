@@ -4,14 +4,18 @@ Classe abstraite de base pour tous les collecteurs.
 
 import asyncio
 import logging
+import random
+import time
+import weakref
 from abc import ABC, abstractmethod
-from typing import Dict, List, Optional, Any, Callable
+from itertools import chain, islice
+from typing import Dict, List, Optional, Any, Callable, Iterable
 from datetime import datetime, date
 import aiohttp
 import json
 
 from ..config.settings import Settings
-from .rate_limiter import RateLimiter
+from .rate_limiter import RateLimiter, AdaptiveConcurrencyLimiter
 
 logger = logging.getLogger(__name__)
 
@@ -23,6 +27,41 @@ except ImportError:
     SUPABASE_AVAILABLE = False
     logger.warning("Supabase client not available, storage will be skipped")
 
+# Import conditionnel d'orjson (décodage JSON plus rapide, fallback stdlib)
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+json_loads = orjson.loads if ORJSON_AVAILABLE else json.loads
+
+# Connecteurs TCP partagés par event loop : un seul pool de connexions keep-alive
+# (et un seul cache DNS) pour toutes les sessions créées par les collecteurs
+_SHARED_CONNECTORS: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, aiohttp.TCPConnector]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_shared_connector() -> aiohttp.TCPConnector:
+    """
+    Retourne le connecteur TCP partagé de l'event loop courant (créé au besoin).
+    
+    Les sessions qui l'utilisent doivent être créées avec `connector_owner=False`
+    pour que leur fermeture ne ferme pas le pool commun.
+    """
+    loop = asyncio.get_running_loop()
+    connector = _SHARED_CONNECTORS.get(loop)
+    if connector is None or connector.closed:
+        connector = aiohttp.TCPConnector(
+            limit=100,
+            limit_per_host=20,
+            ttl_dns_cache=300,
+            keepalive_timeout=60
+        )
+        _SHARED_CONNECTORS[loop] = connector
+    return connector
+
 
 class BaseCollector(ABC):
     """
@@ -36,12 +75,17 @@ class BaseCollector(ABC):
     - Gestion des erreurs
     """
     
+    # Plafond du backoff entre deux tentatives (secondes, hors jitter)
+    MAX_RETRY_BACKOFF = 8.0
+    
     def __init__(
         self,
         source_name: str,
         api_key: Optional[str] = None,
         rate_limiter: Optional[RateLimiter] = None,
-        settings: Optional[Settings] = None
+        settings: Optional[Settings] = None,
+        concurrency_limiter: Optional[AdaptiveConcurrencyLimiter] = None,
+        session: Optional[aiohttp.ClientSession] = None
     ):
         """
         Initialise le collecteur.
@@ -51,19 +95,24 @@ class BaseCollector(ABC):
             api_key: Clé API pour cette source
             rate_limiter: Instance de RateLimiter
             settings: Configuration globale
+            concurrency_limiter: Plafond adaptatif de requêtes HTTP simultanées (optionnel)
+            session: Session HTTP fournie par l'appelant (jamais fermée par le collecteur) ;
+                si None, une session sur le connecteur partagé est créée au besoin
         """
         self.source_name = source_name
         self.api_key = api_key
         self.rate_limiter = rate_limiter
+        self.concurrency_limiter = concurrency_limiter
         self.settings = settings or Settings.from_env()
-        self.session: Optional[aiohttp.ClientSession] = None
+        self.session: Optional[aiohttp.ClientSession] = session
+        self._owns_session = session is None
         self._supabase_client: Optional[Any] = None  # Client Supabase (lazy init)
         
         logger.info(f"Initialized collector: {source_name}")
     
     async def __aenter__(self):
         """Context manager entry."""
-        self.session = aiohttp.ClientSession()
+        self._ensure_session()
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
@@ -72,10 +121,25 @@ class BaseCollector(ABC):
     
     async def close(self):
         """Ferme les ressources du collecteur (session HTTP, etc.)."""
-        if self.session:
+        if self.session and self._owns_session:
             await self.session.close()
             self.session = None
     
+    def _ensure_session(self) -> aiohttp.ClientSession:
+        """
+        Retourne la session HTTP du collecteur, en la créant au besoin.
+        
+        Les sessions créées ici partagent le connecteur TCP de l'event loop : pas de
+        nouveau handshake TCP/TLS par collecteur une fois le pool chaud.
+        """
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession(
+                connector=get_shared_connector(),
+                connector_owner=False
+            )
+            self._owns_session = True
+        return self.session
+    
     async def collect(
         self,
         date_range: Optional[Dict[str, date]] = None,
@@ -93,8 +157,7 @@ class BaseCollector(ABC):
         Returns:
             Liste de données collectées et normalisées
         """
-        if not self.session:
-            self.session = aiohttp.ClientSession()
+        self._ensure_session()
         
         try:
             # Rate limiting
@@ -152,8 +215,9 @@ class BaseCollector(ABC):
             logger.error(f"Error collecting data from {self.source_name}: {e}", exc_info=True)
             raise
         finally:
-            if self.session and not hasattr(self, '_keep_session'):
+            if self.session and self._owns_session and not hasattr(self, '_keep_session'):
                 await self.session.close()
+                self.session = None
     
     @abstractmethod
     async def _fetch_data(
@@ -199,11 +263,26 @@ class BaseCollector(ABC):
         # Validation basique par défaut
         return data is not None and isinstance(data, dict)
     
+    def _retry_delay(self, attempt: int, multiplier: float = 1.0) -> float:
+        """
+        Attente avant la tentative suivante : backoff exponentiel plafonné + jitter.
+        
+        Args:
+            attempt: Numéro de la tentative échouée (0 = première)
+            multiplier: Facteur appliqué au backoff (ex: 2 pour les rate limits)
+        
+        Returns:
+            Durée d'attente en secondes
+        """
+        backoff = self.settings.retry_backoff_factor ** attempt * multiplier
+        return min(backoff, self.MAX_RETRY_BACKOFF) + random.uniform(0, 1)
+    
     async def _retry_with_backoff(
         self,
         func: Callable,
         max_retries: Optional[int] = None,
         *args,
+        retry_other_errors: bool = True,
         **kwargs
     ) -> Any:
         """
@@ -213,10 +292,17 @@ class BaseCollector(ABC):
         - 429 (Rate Limit) : Attend plus longtemps
         - 5xx (Server Error) : Retry avec backoff
         - 4xx (Client Error) : Pas de retry (erreur client)
+        - Erreurs réseau / timeout : Retry avec backoff
+        - Autres erreurs (configuration, parsing...) : Retry, sauf si retry_other_errors=False
+        
+        L'attente est plafonnée à MAX_RETRY_BACKOFF et complétée d'un jitter aléatoire
+        (désynchronise les appelants concurrents qui échouent ensemble).
         
         Args:
             func: Fonction à exécuter (doit être async)
             max_retries: Nombre maximum de tentatives (None = utiliser settings)
+            retry_other_errors: Si False, seules les erreurs transitoires (429, 5xx,
+                réseau, timeout) sont réessayées ; les autres remontent immédiatement
             *args, **kwargs: Arguments à passer à la fonction
             
         Returns:
@@ -228,8 +314,6 @@ class BaseCollector(ABC):
         if max_retries is None:
             max_retries = self.settings.max_retries
         
-        backoff_factor = self.settings.retry_backoff_factor
-        
         for attempt in range(max_retries):
             try:
                 return await func(*args, **kwargs)
@@ -259,16 +343,16 @@ class BaseCollector(ABC):
                 
                 # Backoff plus long pour rate limits
                 if e.status == 429:
-                    wait_time = backoff_factor ** attempt * 2  # Double le temps pour rate limits
+                    wait_time = self._retry_delay(attempt, multiplier=2)  # Double le temps pour rate limits
                     logger.warning(
                         f"Rate limit hit for {self.source_name} (attempt {attempt + 1}/{max_retries}), "
-                        f"waiting {wait_time}s..."
+                        f"waiting {wait_time:.1f}s..."
                     )
                 else:
-                    wait_time = backoff_factor ** attempt
+                    wait_time = self._retry_delay(attempt)
                     logger.warning(
                         f"Server error {e.status} for {self.source_name} (attempt {attempt + 1}/{max_retries}), "
-                        f"retrying in {wait_time}s: {e.message}"
+                        f"retrying in {wait_time:.1f}s: {e.message}"
                     )
                 
                 await asyncio.sleep(wait_time)
@@ -278,26 +362,30 @@ class BaseCollector(ABC):
                 if attempt == max_retries - 1:
                     raise
                 
-                wait_time = backoff_factor ** attempt
+                wait_time = self._retry_delay(attempt)
                 logger.warning(
                     f"Network error for {self.source_name} (attempt {attempt + 1}/{max_retries}), "
-                    f"retrying in {wait_time}s: {e}"
+                    f"retrying in {wait_time:.1f}s: {e}"
                 )
                 await asyncio.sleep(wait_time)
                 
             except Exception as e:
                 # Autres erreurs - retry selon la nature
-                if attempt == max_retries - 1:
+                if not retry_other_errors or attempt == max_retries - 1:
                     raise
                 
-                wait_time = backoff_factor ** attempt
+                wait_time = self._retry_delay(attempt)
                 logger.warning(
                     f"Error for {self.source_name} (attempt {attempt + 1}/{max_retries}), "
-                    f"retrying in {wait_time}s: {e}"
+                    f"retrying in {wait_time:.1f}s: {e}"
                 )
                 await asyncio.sleep(wait_time)
     
-    async def _store_raw_data(self, data: List[Dict[str, Any]]) -> None:
+    async def _store_raw_data(
+        self,
+        data: Iterable[Dict[str, Any]],
+        batch_size: int = 500
+    ) -> None:
         """
         Stocke les données brutes dans Supabase.
         
@@ -308,16 +396,24 @@ class BaseCollector(ABC):
         - news_* → raw_news_data
         - trends_* → raw_market_trends_data
         
+        Les records sont envoyés par lots de `batch_size` lignes : un upsert (une requête
+        HTTP) par lot, jamais une requête par ligne. `data` peut être un générateur :
+        il est consommé lot par lot, sans matérialiser la liste complète.
+        
         Args:
-            data: Liste de données à stocker (doivent correspondre au schéma de la table)
+            data: Données à stocker (liste ou itérable ; doivent correspondre au schéma de la table)
+            batch_size: Nombre maximum de records par upsert
         """
         if not SUPABASE_AVAILABLE:
             logger.warning("Supabase not available, skipping storage")
             return
         
-        if not data:
+        records = iter(data)
+        first = next(records, None)
+        if first is None:
             logger.warning(f"No data to store for {self.source_name}")
             return
+        records = chain((first,), records)
         
         try:
             # Créer client Supabase si pas déjà fait
@@ -339,33 +435,6 @@ class BaseCollector(ABC):
                 logger.warning(f"Unknown table for source {self.source_name}, skipping storage")
                 return
             
-            # Préparer les données pour insertion
-            records_to_insert = []
-            for record in data:
-                record_copy = record.copy()
-                
-                # S'assurer que raw_data est en JSONB (Supabase accepte dict directement)
-                if 'raw_data' in record_copy:
-                    if isinstance(record_copy['raw_data'], str):
-                        try:
-                            record_copy['raw_data'] = json.loads(record_copy['raw_data'])
-                        except json.JSONDecodeError:
-                            pass  # Garder la string si pas JSON valide
-                    # Si c'est déjà un dict, Supabase le convertira en JSONB
-                
-                # Convertir les dates en strings ISO
-                for key, value in record_copy.items():
-                    if isinstance(value, date):
-                        record_copy[key] = value.isoformat()
-                    elif isinstance(value, datetime):
-                        record_copy[key] = value.isoformat()
-                
-                # Ajouter collected_at si manquant
-                if 'collected_at' not in record_copy:
-                    record_copy['collected_at'] = datetime.now().isoformat()
-                
-                records_to_insert.append(record_copy)
-            
             # Insert avec upsert
             # Note: Le client Supabase Python est synchrone, on l'exécute dans un thread pool
             # pour ne pas bloquer l'event loop
@@ -392,36 +461,40 @@ class BaseCollector(ABC):
                 # Contrainte: UNIQUE(source, country, city, trend_date)
                 conflict_columns = 'source,country,city,trend_date'
             
-            if conflict_columns:
-                response = await loop.run_in_executor(
-                    None,
-                    lambda: self._supabase_client.table(table_name).upsert(
-                        records_to_insert,
-                        on_conflict=conflict_columns
-                    ).execute()
-                )
-            else:
+            upsert_kwargs = {'on_conflict': conflict_columns} if conflict_columns else {}
+            
+            batch_size = max(batch_size, 1)
+            stored_count = 0
+            while True:
+                batch = [
+                    self._prepare_record_for_storage(record)
+                    for record in islice(records, batch_size)
+                ]
+                if not batch:
+                    break
+                stored_count += len(batch)
                 response = await loop.run_in_executor(
                     None,
                     lambda: self._supabase_client.table(table_name).upsert(
-                        records_to_insert
+                        batch,
+                        **upsert_kwargs
                     ).execute()
                 )
-            
-            # Vérifier les erreurs
-            if hasattr(response, 'error') and response.error:
-                # Si c'est une erreur de duplicate key, ce n'est pas critique (upsert devrait gérer)
-                if 'duplicate key' in str(response.error).lower() or '23505' in str(response.error):
-                    logger.warning(
-                        f"Duplicate key detected for {self.source_name} in {table_name}. "
-                        f"This is normal if data already exists (upsert should handle it)."
-                    )
-                    # Ne pas lever d'exception, considérer comme succès
-                else:
-                    raise Exception(f"Supabase error: {response.error}")
+                
+                # Vérifier les erreurs
+                if hasattr(response, 'error') and response.error:
+                    # Si c'est une erreur de duplicate key, ce n'est pas critique (upsert devrait gérer)
+                    if 'duplicate key' in str(response.error).lower() or '23505' in str(response.error):
+                        logger.warning(
+                            f"Duplicate key detected for {self.source_name} in {table_name}. "
+                            f"This is normal if data already exists (upsert should handle it)."
+                        )
+                        # Ne pas lever d'exception, considérer comme succès
+                    else:
+                        raise Exception(f"Supabase error: {response.error}")
             
             logger.info(
-                f"Stored {len(records_to_insert)} records for {self.source_name} "
+                f"Stored {stored_count} records for {self.source_name} "
                 f"in table {table_name}"
             )
         
@@ -440,6 +513,40 @@ class BaseCollector(ABC):
             # Ne pas faire échouer la collecte si le stockage échoue
             # (on peut reprocesser plus tard)
     
+    def _prepare_record_for_storage(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Prépare une copie d'un record pour l'upsert Supabase.
+        
+        Args:
+            record: Record normalisé
+            
+        Returns:
+            Copie avec raw_data en JSON, dates en ISO et collected_at renseigné
+        """
+        record_copy = record.copy()
+        
+        # S'assurer que raw_data est en JSONB (Supabase accepte dict directement)
+        if 'raw_data' in record_copy:
+            if isinstance(record_copy['raw_data'], str):
+                try:
+                    record_copy['raw_data'] = json_loads(record_copy['raw_data'])
+                except json.JSONDecodeError:
+                    pass  # Garder la string si pas JSON valide
+            # Si c'est déjà un dict, Supabase le convertira en JSONB
+        
+        # Convertir les dates en strings ISO
+        for key, value in record_copy.items():
+            if isinstance(value, date):
+                record_copy[key] = value.isoformat()
+            elif isinstance(value, datetime):
+                record_copy[key] = value.isoformat()
+        
+        # Ajouter collected_at si manquant
+        if 'collected_at' not in record_copy:
+            record_copy['collected_at'] = datetime.now().isoformat()
+        
+        return record_copy
+    
     def _get_table_name(self) -> Optional[str]:
         """
         Détermine le nom de la table Supabase selon source_name.
@@ -469,7 +576,8 @@ class BaseCollector(ABC):
         headers: Optional[Dict[str, str]] = None,
         params: Optional[Dict[str, Any]] = None,
         json_data: Optional[Dict[str, Any]] = None,
-        timeout: int = 30
+        timeout: int = 30,
+        response_info: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
         """
         Effectue une requête HTTP avec gestion d'erreurs.
@@ -481,16 +589,17 @@ class BaseCollector(ABC):
             params: Query parameters
             json_data: JSON body (pour POST/PUT)
             timeout: Timeout en secondes
+            response_info: Si fourni, rempli avec 'status', 'etag' et 'last_modified'
+                de la réponse (requêtes conditionnelles)
             
         Returns:
-            Réponse JSON parsée
+            Réponse JSON parsée ({} pour un 304 Not Modified)
             
         Raises:
             aiohttp.ClientResponseError: Pour erreurs HTTP
             aiohttp.ClientError: Pour erreurs réseau
         """
-        if not self.session:
-            self.session = aiohttp.ClientSession()
+        self._ensure_session()
         
         request_headers = headers or {}
         if self.api_key and 'Authorization' not in request_headers:
@@ -498,6 +607,11 @@ class BaseCollector(ABC):
         
         timeout_obj = aiohttp.ClientTimeout(total=timeout)
         
+        if self.concurrency_limiter:
+            await self.concurrency_limiter.acquire()
+        started = time.monotonic()
+        ok = False
+        
         try:
             async with self.session.request(
                 method=method,
@@ -507,12 +621,28 @@ class BaseCollector(ABC):
                 json=json_data,
                 timeout=timeout_obj
             ) as response:
+                # Surcharge (429) et erreurs serveur (5xx) : signal de réduction pour l'AIMD
+                ok = response.status < 500 and response.status != 429
+                
+                # Répercuter l'état de quota annoncé par le serveur (y compris sur 429)
+                if self.rate_limiter:
+                    self.rate_limiter.update_from_headers(response.headers)
+                
                 # Gérer les erreurs HTTP
                 response.raise_for_status()
                 
+                if response_info is not None:
+                    response_info['status'] = response.status
+                    response_info['etag'] = response.headers.get('ETag')
+                    response_info['last_modified'] = response.headers.get('Last-Modified')
+                
+                # 304 : pas de corps, l'appelant réutilise sa copie
+                if response.status == 304:
+                    return {}
+                
                 # Parser JSON
                 try:
-                    return await response.json()
+                    return await response.json(loads=json_loads)
                 except aiohttp.ContentTypeError:
                     # Si pas JSON, retourner le texte
                     text = await response.text()
@@ -525,4 +655,7 @@ class BaseCollector(ABC):
         except asyncio.TimeoutError:
             logger.error(f"Timeout for {url}")
             raise
+        finally:
+            if self.concurrency_limiter:
+                await self.concurrency_limiter.release(time.monotonic() - started, ok)
 
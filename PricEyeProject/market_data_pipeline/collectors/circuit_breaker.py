@@ -0,0 +1,91 @@
+"""
+Disjoncteur (circuit breaker) pour les appels aux APIs externes.
+"""
+
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(RuntimeError):
+    """Levée quand un appel est refusé parce que le disjoncteur est ouvert."""
+    pass
+
+
+class CircuitBreaker:
+    """
+    Disjoncteur à trois états (closed / open / half_open).
+    
+    - closed : les appels passent ; chaque échec incrémente le compteur.
+    - open : après `failure_threshold` échecs consécutifs, les appels sont refusés
+      immédiatement (CircuitOpenError) pendant `reset_timeout` secondes.
+    - half_open : une fois le délai écoulé, un seul appel de test est autorisé ;
+      son succès referme le circuit, son échec le rouvre. Un test sans résultat
+      (appel annulé) n'immobilise pas le circuit : un nouveau test est autorisé
+      après `reset_timeout` secondes.
+    """
+    
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+    
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        """
+        Initialise le disjoncteur.
+        
+        Args:
+            failure_threshold: Nombre d'échecs consécutifs avant ouverture
+            reset_timeout: Durée d'ouverture avant l'appel de test (secondes)
+        """
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failure_count = 0
+        # Instant d'ouverture, puis de début de l'appel de test en half_open
+        self.opened_at = 0.0
+    
+    def allow_request(self) -> bool:
+        """
+        Indique si un appel peut être tenté maintenant.
+        
+        Passe en half_open (et autorise l'appel de test) quand le délai d'ouverture
+        est écoulé ; pendant le test, les autres appels restent refusés, au plus
+        `reset_timeout` secondes (test resté sans résultat : un autre est autorisé).
+        """
+        if self.state == self.CLOSED:
+            return True
+        now = time.monotonic()
+        if now - self.opened_at >= self.reset_timeout:
+            self.state = self.HALF_OPEN
+            self.opened_at = now
+            return True
+        return False
+    
+    def before_request(self, name: str = "") -> None:
+        """
+        Vérifie que l'appel est autorisé.
+        
+        Raises:
+            CircuitOpenError: Si le circuit est ouvert (ou un test déjà en cours)
+        """
+        if not self.allow_request():
+            raise CircuitOpenError(f"Circuit open for {name or 'source'}, skipping call")
+    
+    def record_success(self) -> None:
+        """Enregistre un succès : referme le circuit."""
+        if self.state != self.CLOSED:
+            logger.info("Circuit closed after successful probe")
+        self.state = self.CLOSED
+        self.failure_count = 0
+    
+    def record_failure(self) -> None:
+        """Enregistre un échec : ouvre le circuit au seuil (ou si le test échoue)."""
+        self.failure_count += 1
+        if self.state == self.HALF_OPEN or self.failure_count >= self.failure_threshold:
+            if self.state != self.OPEN:
+                logger.warning(
+                    f"Circuit opened after {self.failure_count} consecutive failures"
+                )
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
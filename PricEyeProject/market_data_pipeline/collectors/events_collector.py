@@ -7,9 +7,8 @@ import logging
 from typing import Dict, List, Optional, Any
 from datetime import date, datetime, timedelta
 import random
-import aiohttp
 
-from .base_collector import BaseCollector
+from .base_collector import BaseCollector, json_loads
 from ..config.api_keys import get_api_key, API_SERVICES
 from ..config.cities_config import get_city_config
 
@@ -105,8 +104,7 @@ class EventsCollector(BaseCollector):
             }
         
         # Initialiser la session si nécessaire
-        if not self.session:
-            self.session = aiohttp.ClientSession()
+        self._ensure_session()
         
         try:
             # Rate limiting
@@ -242,7 +240,7 @@ class EventsCollector(BaseCollector):
             # Faire la requête
             async with self.session.get(url, params=params) as response:
                 if response.status == 200:
-                    data = await response.json()
+                    data = await response.json(loads=json_loads)
                     return {
                         'source': 'eventbrite',
                         'items': data.get('events', []),
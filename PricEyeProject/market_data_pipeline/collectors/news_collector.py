@@ -4,18 +4,69 @@ Collecteur de news locales (NewsAPI, Google News RSS avec fallback).
 
 import asyncio
 import logging
-from typing import Dict, List, Optional, Any
+from typing import Callable, Dict, List, Optional, Any, Sequence
 from datetime import date, datetime, timedelta
+from email.utils import parsedate_to_datetime
 import re
 from urllib.parse import quote_plus
 
 import aiohttp
 
-from .base_collector import BaseCollector
+from .base_collector import BaseCollector, json_loads
 from ..config.api_keys import get_api_key, API_SERVICES
 
 logger = logging.getLogger(__name__)
 
+# Import conditionnel de Hyperscan (filtrage par mots-clés en une seule passe)
+try:
+    import hyperscan
+    HYPERSCAN_AVAILABLE = True
+except ImportError:
+    HYPERSCAN_AVAILABLE = False
+
+# Regex du parsing RSS basique (fallback sans feedparser), compilées une seule fois
+_RSS_ITEM_RE = re.compile(r'<item>(.*?)</item>', re.DOTALL)
+_RSS_TITLE_RE = re.compile(r'<title><!\[CDATA\[(.*?)\]\]></title>')
+_RSS_LINK_RE = re.compile(r'<link>(.*?)</link>')
+_RSS_DESCRIPTION_RE = re.compile(r'<description><!\[CDATA\[(.*?)\]\]></description>')
+_RSS_PUB_DATE_RE = re.compile(r'<pubDate>(.*?)</pubDate>')
+_RSS_SOURCE_RE = re.compile(r'<source>(.*?)</source>')
+
+
+def _build_keyword_matcher(keywords: Sequence[str]) -> Callable[[str], bool]:
+    """
+    Compile les mots-clés en un seul automate et retourne un prédicat `text -> bool`.
+    
+    Utilise une base Hyperscan (caseless, single-match) si disponible, sinon une
+    alternance regex compilée. Les deux font une recherche de sous-chaîne, comme
+    l'ancienne boucle mot-clé par mot-clé.
+    """
+    if HYPERSCAN_AVAILABLE:
+        try:
+            database = hyperscan.Database(mode=hyperscan.HS_MODE_BLOCK)
+            database.compile(
+                expressions=[re.escape(keyword).encode('utf-8') for keyword in keywords],
+                ids=list(range(len(keywords))),
+                elements=len(keywords),
+                flags=[hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_SINGLEMATCH] * len(keywords)
+            )
+            
+            def hyperscan_match(text: str) -> bool:
+                match_found = [False]
+                
+                def on_match(*_args):
+                    match_found[0] = True
+                
+                database.scan(text.encode('utf-8', 'ignore'), match_event_handler=on_match)
+                return match_found[0]
+            
+            return hyperscan_match
+        except Exception as e:
+            logger.warning(f"Hyperscan compilation failed, falling back to regex: {e}")
+    
+    pattern = re.compile('|'.join(re.escape(keyword) for keyword in keywords))
+    return lambda text: pattern.search(text) is not None
+
 
 class NewsCollector(BaseCollector):
     """
@@ -44,6 +95,15 @@ class NewsCollector(BaseCollector):
         'conference', 'conférence', 'summit', 'sommet'
     ]
     
+    # Ensemble des mots-clés (dédupliqués, ordre conservé) compilé paresseusement
+    ALL_KEYWORDS = tuple(dict.fromkeys(
+        keyword.lower() for keyword in TOURISM_KEYWORDS + LOCAL_EVENT_KEYWORDS
+    ))
+    _keyword_matcher: Optional[Callable[[str], bool]] = None
+    
+    # Sur-échantillonnage à la collecte pour compenser l'attrition du filtrage de pertinence
+    RELEVANCE_OVERSAMPLE_FACTOR = 2
+    
     def __init__(
         self,
         primary_source: str = "newsapi",
@@ -89,6 +149,11 @@ class NewsCollector(BaseCollector):
             **kwargs
         )
         
+        # Nombre d'articles bruts au-delà duquel la collecte s'arrête
+        self.fetch_limit = (
+            max_articles * self.RELEVANCE_OVERSAMPLE_FACTOR if filter_relevant else max_articles
+        )
+        
         logger.info(
             f"Initialized NewsCollector (primary: {self.primary_source}, "
             f"fallback: {self.fallback_source}, days_back: {days_back})"
@@ -117,8 +182,7 @@ class NewsCollector(BaseCollector):
             days_back = self.days_back
         
         # Initialiser la session si nécessaire
-        if not self.session:
-            self.session = aiohttp.ClientSession()
+        self._ensure_session()
         
         try:
             # Rate limiting
@@ -221,7 +285,7 @@ class NewsCollector(BaseCollector):
         all_articles = []
         page = 1
         page_size = 100
-        max_pages = (self.max_articles // page_size) + 1
+        max_pages = (self.fetch_limit // page_size) + 1
         
         while page <= max_pages:
             params = {
@@ -237,7 +301,7 @@ class NewsCollector(BaseCollector):
             try:
                 async with self.session.get(url, params=params) as response:
                     if response.status == 200:
-                        data = await response.json()
+                        data = await response.json(loads=json_loads)
                         articles = data.get('articles', [])
                         
                         if not articles:
@@ -245,6 +309,11 @@ class NewsCollector(BaseCollector):
                         
                         all_articles.extend(articles)
                         
+                        # Assez d'articles pour max_articles après filtrage : inutile de paginer
+                        if len(all_articles) >= self.fetch_limit:
+                            del all_articles[self.fetch_limit:]
+                            break
+                        
                         # Vérifier s'il y a plus de pages
                         total_results = data.get('totalResults', 0)
                         if len(all_articles) >= total_results or len(articles) < page_size:
@@ -347,6 +416,8 @@ class NewsCollector(BaseCollector):
             articles = []
             
             for entry in feed.entries:
+                if len(articles) >= self.fetch_limit:
+                    break
                 try:
                     # Parser la date
                     pub_date = entry.get('published_parsed')
@@ -381,87 +452,37 @@ class NewsCollector(BaseCollector):
         # Fallback: parsing basique avec regex
         articles = []
         
-        # Regex pour extraire les items
-        item_pattern = r'<item>(.*?)</item>'
-        items = re.findall(item_pattern, xml_content, re.DOTALL)
-        
-        for item in items:
-            try:
-                # Extraire le titre
-                title_match = re.search(r'<title><!\[CDATA\[(.*?)\]\]></title>', item)
-                title = title_match.group(1) if title_match else ''
-                
-                # Extraire le lien
-                link_match = re.search(r'<link>(.*?)</link>', item)
-                link = link_match.group(1) if link_match else ''
-                
-                # Extraire la description
-                desc_match = re.search(r'<description><!\[CDATA\[(.*?)\]\]></description>', item)
-                description = desc_match.group(1) if desc_match else ''
-                
-                # Extraire la date de publication
-                pub_match = re.search(r'<pubDate>(.*?)</pubDate>', item)
-                pub_date_str = pub_match.group(1) if pub_match else ''
-                
-                # Parser la date
-                try:
-                    from email.utils import parsedate_to_datetime
-                    pub_date = parsedate_to_datetime(pub_date_str)
-                except:
-                    pub_date = datetime.now()
-                
-                # Extraire le source (media)
-                source_match = re.search(r'<source>(.*?)</source>', item)
-                source_name = source_match.group(1) if source_match else ''
-                
-                if title and link:
-                    articles.append({
-                        'title': title,
-                        'description': description,
-                        'url': link,
-                        'publishedAt': pub_date.isoformat() if isinstance(pub_date, datetime) else pub_date_str,
-                        'source': {'name': source_name},
-                        'content': description  # Pour Google News RSS, description = contenu
-                    })
-            
-            except Exception as e:
-                logger.warning(f"Error parsing RSS item: {e}")
-                continue
-        
-        return articles
-        articles = []
-        
-        # Regex pour extraire les items
-        item_pattern = r'<item>(.*?)</item>'
-        items = re.findall(item_pattern, xml_content, re.DOTALL)
+        # Extraire les items
+        items = _RSS_ITEM_RE.findall(xml_content)
         
         for item in items:
+            if len(articles) >= self.fetch_limit:
+                break
             try:
                 # Extraire le titre
-                title_match = re.search(r'<title><!\[CDATA\[(.*?)\]\]></title>', item)
+                title_match = _RSS_TITLE_RE.search(item)
                 title = title_match.group(1) if title_match else ''
                 
                 # Extraire le lien
-                link_match = re.search(r'<link>(.*?)</link>', item)
+                link_match = _RSS_LINK_RE.search(item)
                 link = link_match.group(1) if link_match else ''
                 
                 # Extraire la description
-                desc_match = re.search(r'<description><!\[CDATA\[(.*?)\]\]></description>', item)
+                desc_match = _RSS_DESCRIPTION_RE.search(item)
                 description = desc_match.group(1) if desc_match else ''
                 
                 # Extraire la date de publication
-                pub_match = re.search(r'<pubDate>(.*?)</pubDate>', item)
+                pub_match = _RSS_PUB_DATE_RE.search(item)
                 pub_date_str = pub_match.group(1) if pub_match else ''
                 
                 # Parser la date
                 try:
-                    from email.utils import parsedate_to_datetime
                     pub_date = parsedate_to_datetime(pub_date_str)
                 except:
                     pub_date = datetime.now()
                 
                 # Extraire le source (media)
-                source_match = re.search(r'<source>(.*?)</source>', item)
+                source_match = _RSS_SOURCE_RE.search(item)
                 source_name = source_match.group(1) if source_match else ''
                 
                 if title and link:
@@ -511,6 +532,12 @@ class NewsCollector(BaseCollector):
         """
         relevant_articles = []
         
+        # Compiler le filtre une seule fois pour toutes les instances
+        cls = type(self)
+        if cls._keyword_matcher is None:
+            cls._keyword_matcher = _build_keyword_matcher(cls.ALL_KEYWORDS)
+        contains_keyword = cls._keyword_matcher
+        
         for article in articles:
             # Combiner titre, description et contenu pour la recherche
             text_to_search = ' '.join([
@@ -520,24 +547,11 @@ class NewsCollector(BaseCollector):
                 article.get('description', '')
             ]).lower()
             
-            # Vérifier si l'article contient des mots-clés pertinents
-            is_relevant = False
-            
-            # Vérifier les mots-clés de tourisme
-            for keyword in self.TOURISM_KEYWORDS:
-                if keyword.lower() in text_to_search:
-                    is_relevant = True
-                    break
-            
-            # Vérifier les mots-clés d'événements locaux
-            if not is_relevant:
-                for keyword in self.LOCAL_EVENT_KEYWORDS:
-                    if keyword.lower() in text_to_search:
-                        is_relevant = True
-                        break
-            
-            if is_relevant:
+            # Vérifier si l'article contient des mots-clés pertinents (tourisme ou événements)
+            if contains_keyword(text_to_search):
                 relevant_articles.append(article)
+                if len(relevant_articles) >= self.max_articles:
+                    break
         
         logger.info(
             f"Filtered {len(relevant_articles)} relevant articles "
@@ -572,15 +586,26 @@ class NewsCollector(BaseCollector):
         
         normalized = []
         
+        # Valeurs communes à tout le lot : calculées une seule fois
+        now = datetime.now()
+        collected_at = now.isoformat()
+        language = self._detect_language_from_country(country)
+        
         for article in articles:
             try:
                 if source == 'newsapi':
-                    record = self._normalize_newsapi(article, city, country)
+                    record = self._normalize_newsapi(
+                        article, city, country, now=now, collected_at=collected_at, language=language
+                    )
                 elif source == 'google_news_rss':
-                    record = self._normalize_google_rss(article, city, country)
+                    record = self._normalize_google_rss(
+                        article, city, country, now=now, collected_at=collected_at, language=language
+                    )
                 else:
                     # Format générique
-                    record = self._normalize_generic(article, city, country, source)
+                    record = self._normalize_generic(
+                        article, city, country, source, now=now, collected_at=collected_at, language=language
+                    )
                 
                 if record:
                     normalized.append(record)
@@ -596,11 +621,19 @@ class NewsCollector(BaseCollector):
         self,
         article: Dict[str, Any],
         city: str,
-        country: str
+        country: str,
+        now: Optional[datetime] = None,
+        collected_at: Optional[str] = None,
+        language: Optional[str] = None
     ) -> Optional[Dict[str, Any]]:
         """
         Normalise un article NewsAPI.
+        
+        `now`, `collected_at` et `language` sont calculés une fois par lot dans `_normalize`.
         """
+        if now is None:
+            now = datetime.now()
+        
         # Headline
         headline = article.get('title', '')
         if not headline:
@@ -618,7 +651,7 @@ class NewsCollector(BaseCollector):
             try:
                 published_at = datetime.strptime(published_at_str, '%Y-%m-%dT%H:%M:%SZ')
             except:
-                published_at = datetime.now()
+                published_at = now
         
         # Description / Résumé
         description = article.get('description', '')
@@ -638,7 +671,8 @@ class NewsCollector(BaseCollector):
         image_url = article.get('urlToImage', '')
         
         # Détecter la langue
-        language = self._detect_language_from_country(country)
+        if language is None:
+            language = self._detect_language_from_country(country)
         
         return {
             'source': 'newsapi',
@@ -656,21 +690,27 @@ class NewsCollector(BaseCollector):
             'sentiment_score': None,  # Sera calculé par NLP Pipeline
             'topics': None,  # Sera extrait par NLP Pipeline
             'metadata': {
-                'newsapi_article_id': article.get('url', '').split('/')[-1] if url else None
+                'newsapi_article_id': url.rpartition('/')[2] if url else None
             },
             'raw_data': article,
-            'collected_at': datetime.now().isoformat()
+            'collected_at': collected_at or now.isoformat()
         }
     
     def _normalize_google_rss(
         self,
         article: Dict[str, Any],
         city: str,
-        country: str
+        country: str,
+        now: Optional[datetime] = None,
+        collected_at: Optional[str] = None,
+        language: Optional[str] = None
     ) -> Optional[Dict[str, Any]]:
         """
         Normalise un article Google News RSS.
         """
+        if now is None:
+            now = datetime.now()
+        
         # Headline
         headline = article.get('title', '')
         if not headline:
@@ -684,7 +724,7 @@ class NewsCollector(BaseCollector):
         try:
             published_at = datetime.fromisoformat(published_at_str.replace('Z', '+00:00'))
         except:
-            published_at = datetime.now()
+            published_at = now
         
         # Description / Contenu
         description = article.get('description', '')
@@ -698,7 +738,8 @@ class NewsCollector(BaseCollector):
         source_name = source_info.get('name', '') if isinstance(source_info, dict) else str(source_info)
         
         # Détecter la langue
-        language = self._detect_language_from_country(country)
+        if language is None:
+            language = self._detect_language_from_country(country)
         
         return {
             'source': 'google_news_rss',
@@ -719,7 +760,7 @@ class NewsCollector(BaseCollector):
                 'google_news_rss': True
             },
             'raw_data': article,
-            'collected_at': datetime.now().isoformat()
+            'collected_at': collected_at or now.isoformat()
         }
     
     def _normalize_generic(
@@ -727,11 +768,17 @@ class NewsCollector(BaseCollector):
         article: Dict[str, Any],
         city: str,
         country: str,
-        source: str
+        source: str,
+        now: Optional[datetime] = None,
+        collected_at: Optional[str] = None,
+        language: Optional[str] = None
     ) -> Optional[Dict[str, Any]]:
         """
         Normalise un article depuis un format générique.
         """
+        if now is None:
+            now = datetime.now()
+        
         headline = article.get('title') or article.get('headline', '')
         if not headline:
             return None
@@ -742,9 +789,9 @@ class NewsCollector(BaseCollector):
             try:
                 published_at = datetime.fromisoformat(published_at_str.replace('Z', '+00:00'))
             except:
-                published_at = datetime.now()
+                published_at = now
         else:
-            published_at = datetime.now()
+            published_at = now
         
         # Contenu
         content = article.get('content') or article.get('article_text') or article.get('description', '')
@@ -764,7 +811,7 @@ class NewsCollector(BaseCollector):
         image_url = article.get('image_url') or article.get('urlToImage', '')
         
         # Langue
-        language = article.get('language') or self._detect_language_from_country(country)
+        language = article.get('language') or language or self._detect_language_from_country(country)
         
         return {
             'source': source,
@@ -783,5 +830,5 @@ class NewsCollector(BaseCollector):
             'topics': None,
             'metadata': article.get('metadata', {}),
             'raw_data': article,
-            'collected_at': datetime.now().isoformat()
+            'collected_at': collected_at or now.isoformat()
         }
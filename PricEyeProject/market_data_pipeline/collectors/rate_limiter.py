@@ -1,20 +1,328 @@
 """
 Rate limiter pour gérer les quotas API par source.
-Utilise un sliding window pour gérer les limites par minute, heure et jour.
+Utilise un sliding window exact pour la limite par minute et un sliding window
+counter (compteurs par tranche) pour les limites par heure et par jour.
+
+Les timestamps en mémoire proviennent de `time.monotonic()` (insensible aux sauts
+d'horloge système) ; ils sont convertis en temps Unix uniquement pour la persistance.
 """
 
 import asyncio
+import atexit
 import time
 import json
+from bisect import bisect_right
 import os
+import threading
+import uuid
+import weakref
 from dataclasses import dataclass, field, asdict
-from typing import Optional, Dict
-from collections import defaultdict, deque
+from array import array
+from typing import Any, Optional, Dict, List, Mapping, Sequence, Set
+from collections import defaultdict
 from datetime import datetime, timedelta
+from email.utils import parsedate_to_datetime
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Import conditionnel d'orjson (sérialisation de l'état plus rapide, fallback stdlib)
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+def _dumps_state(state: Dict[str, Any]) -> bytes:
+    """Sérialise l'état en JSON (bytes)."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(state)
+    return json.dumps(state).encode('utf-8')
+
+
+def _loads_state(data: bytes) -> Dict[str, Any]:
+    """Désérialise un état JSON (bytes)."""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+# Headers de quota renvoyés par les APIs (noms en minuscules, par ordre de priorité)
+_REMAINING_HEADERS = ('x-ratelimit-remaining', 'anthropic-ratelimit-requests-remaining')
+_LIMIT_HEADERS = ('x-ratelimit-limit', 'anthropic-ratelimit-requests-limit')
+_RESET_HEADERS = ('x-ratelimit-reset',)
+# Sous cette fraction du quota serveur restant, on suspend les requêtes
+LOW_REMAINING_RATIO = 0.1
+# Pause (secondes) appliquée quand le quota serveur est bas sans date de reset ni
+# fenêtre connue (le quota peut être horaire ou journalier)
+LOW_QUOTA_PAUSE = 60.0
+
+
+def _first_header(headers: Mapping[str, str], names: Sequence[str]) -> Optional[str]:
+    """Retourne la valeur du premier header présent parmi `names`."""
+    for name in names:
+        value = headers.get(name)
+        if value is not None:
+            return value
+    return None
+
+
+def _parse_delay(value: Optional[str], unix_now: float) -> Optional[float]:
+    """
+    Convertit un header de délai en secondes à attendre depuis `unix_now`.
+    
+    Accepte un nombre de secondes, un timestamp Unix (Retry-After / X-RateLimit-Reset
+    selon les APIs) ou une date HTTP. Retourne None si la valeur est illisible.
+    """
+    if not value:
+        return None
+    try:
+        delay = float(value)
+    except ValueError:
+        try:
+            return max(parsedate_to_datetime(value).timestamp() - unix_now, 0.0)
+        except (TypeError, ValueError):
+            return None
+    # Au-delà d'un an en secondes, il s'agit d'un timestamp Unix absolu
+    if delay > 365 * 86400:
+        delay -= unix_now
+    return max(delay, 0.0)
+
+# Limiteurs avec état persistant, vidés sur disque à l'arrêt du process
+_PERSISTENT_LIMITERS: "weakref.WeakSet[RateLimiter]" = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_persistent_limiters() -> None:
+    """Écrit l'état en attente de tous les limiteurs persistants (arrêt propre)."""
+    for limiter in list(_PERSISTENT_LIMITERS):
+        limiter.flush()
+
+
+def _window_start(request_times: Sequence[float], cutoff: float) -> int:
+    """
+    Retourne l'index du premier timestamp strictement postérieur à `cutoff`.
+    
+    Les timestamps sont ajoutés dans l'ordre chronologique : recherche dichotomique
+    en O(log N) (implémentée en C par `bisect`).
+    """
+    return bisect_right(request_times, cutoff)
+
+
+class TimestampWindow:
+    """
+    Sliding window exact : timestamps triés des requêtes encore dans la fenêtre.
+    
+    Stockés dans un `array('d')` contigu (8 octets par requête, sans objet float Python).
+    
+    Le comptage purge au passage les timestamps expirés : la recherche de la borne de
+    fenêtre sert aussi de curseur de purge, sans passe de nettoyage séparée.
+    
+    Avec `maxlen` (la limite appliquée), seuls les `maxlen` derniers timestamps sont
+    utiles : la mémoire est bornée et `is_full` / `wait_time` lisent `times[-limit]`
+    en O(1), sans purge.
+    """
+    
+    __slots__ = ('window', 'times', 'maxlen')
+    
+    def __init__(self, window: float, maxlen: Optional[int] = None):
+        self.window = window
+        self.times = array('d')
+        self.maxlen = maxlen
+    
+    def prune(self, now: float) -> int:
+        """Supprime les timestamps sortis de la fenêtre et retourne le compteur restant."""
+        times = self.times
+        if times and (now - times[0]) > self.window:
+            del times[:_window_start(times, now - self.window)]
+        return len(times)
+    
+    def add(self, now: float) -> None:
+        """Enregistre une requête à l'instant `now`."""
+        times = self.times
+        times.append(now)
+        # Éviction par lots des plus anciens : coût amorti O(1) par ajout
+        if self.maxlen and len(times) >= 2 * self.maxlen:
+            del times[:-self.maxlen]
+    
+    def count(self, now: float) -> int:
+        """Nombre de requêtes dans la fenêtre se terminant à `now`."""
+        return self.prune(now)
+    
+    def is_full(self, now: float, limit: int) -> bool:
+        """True si `limit` requêtes ou plus sont dans la fenêtre (O(1))."""
+        times = self.times
+        return len(times) >= limit and now - times[-limit] < self.window
+    
+    def wait_time(self, now: float, limit: int) -> float:
+        """
+        Temps avant que le compteur repasse sous `limit`.
+        
+        Les timestamps sont triés : il faut attendre la sortie du `limit`-ième plus
+        récent (le plus ancien dans la fenêtre si la fenêtre est pleine).
+        """
+        times = self.times
+        if len(times) < limit:
+            return 0.0
+        return max(self.window - (now - times[-limit]), 0.0)
+
+
+class BucketedWindow:
+    """
+    Sliding window counter : compteurs entiers par tranche de temps fixe.
+    
+    La fenêtre de `window` secondes est découpée en `num_buckets` tranches ; on garde
+    une tranche de plus que nécessaire pour couvrir la tranche en cours de remplissage.
+    La mémoire est en O(num_buckets) quel que soit le nombre de requêtes.
+    
+    La tranche la plus ancienne (partiellement sortie de la fenêtre) est comptée en
+    entier plutôt qu'interpolée : le compteur ne sous-estime jamais la fenêtre réelle,
+    au prix d'une limite au plus une tranche plus stricte.
+    
+    Le total est maintenu à chaque ajout / remise à zéro : `count()` est en O(1) tant
+    que la tranche courante ne change pas.
+    """
+    
+    __slots__ = ('window', 'num_buckets', 'bucket_width', 'buckets', 'current', 'total')
+    
+    def __init__(self, window: float, num_buckets: int):
+        self.window = window
+        self.num_buckets = num_buckets
+        self.bucket_width = window / num_buckets
+        self.buckets: List[int] = [0] * (num_buckets + 1)
+        # Index absolu (now // bucket_width) de la tranche courante
+        self.current: Optional[int] = None
+        # Somme des tranches
+        self.total = 0
+    
+    def _advance(self, now: float) -> None:
+        """Fait avancer la tranche courante en remettant à zéro les tranches dépassées."""
+        index = int(now // self.bucket_width)
+        current = self.current
+        if current is None:
+            self.current = index
+            return
+        if index <= current:
+            return
+        
+        buckets = self.buckets
+        size = len(buckets)
+        if index - current >= size:
+            self.buckets = [0] * size
+            self.total = 0
+        else:
+            for i in range(current + 1, index + 1):
+                slot = i % size
+                self.total -= buckets[slot]
+                buckets[slot] = 0
+        self.current = index
+    
+    def add(self, now: float, count: int = 1) -> None:
+        """Enregistre `count` requêtes à l'instant `now`."""
+        self._advance(now)
+        self.buckets[self.current % len(self.buckets)] += count
+        self.total += count
+    
+    def count(self, now: float) -> int:
+        """Nombre de requêtes dans la fenêtre se terminant à `now`."""
+        self._advance(now)
+        return self.total
+    
+    def is_full(self, now: float, limit: int) -> bool:
+        """True si le compteur de la fenêtre atteint `limit`."""
+        return self.count(now) >= limit
+    
+    def wait_time(self, now: float, limit: int) -> float:
+        """
+        Temps avant que le compteur repasse sous `limit`.
+        
+        Parcourt les tranches de la plus ancienne à la plus récente : la tranche
+        d'index absolu `j` sort de la fenêtre quand la tranche courante atteint
+        `j + num_buckets + 1`.
+        """
+        remaining = self.count(now)
+        if remaining < limit:
+            return 0.0
+        
+        size = len(self.buckets)
+        for j in range(self.current - self.num_buckets, self.current + 1):
+            remaining -= self.buckets[j % size]
+            if remaining < limit:
+                return max((j + size) * self.bucket_width - now, 0.0)
+        return self.window
+    
+    def to_state(self, offset: float) -> List[List[float]]:
+        """
+        Sérialise les tranches non vides en paires `[fin de tranche en temps Unix, compteur]`.
+        """
+        if self.current is None:
+            return []
+        size = len(self.buckets)
+        return [
+            [(j + 1) * self.bucket_width + offset, self.buckets[j % size]]
+            for j in range(self.current - self.num_buckets, self.current + 1)
+            if self.buckets[j % size]
+        ]
+    
+    def load_state(self, state: List[List[float]], offset: float, now: float) -> None:
+        """
+        Recharge des tranches sérialisées par `to_state`.
+        
+        Chaque compteur est rattaché à la tranche contenant la fin de sa tranche
+        d'origine : il expire au plus tard, jamais plus tôt.
+        """
+        self._advance(now)
+        for bucket_end, count in state:
+            t = bucket_end - offset
+            if now - t < self.window:
+                index = min(int(t // self.bucket_width), self.current)
+                if index > self.current - len(self.buckets):
+                    self.buckets[index % len(self.buckets)] += int(count)
+                    self.total += int(count)
+
+
+class TokenBucket:
+    """
+    Token bucket : `capacity` jetons, rechargés à `capacity / window` jetons par seconde.
+    
+    État en O(1) (jetons disponibles + instant de la dernière recharge). Autorise des
+    rafales jusqu'à `capacity`, contrairement au sliding window qui borne strictement
+    chaque fenêtre glissante.
+    """
+    
+    __slots__ = ('capacity', 'rate', 'tokens', 'last')
+    
+    def __init__(self, capacity: int, window: float):
+        self.capacity = capacity
+        self.rate = capacity / window
+        self.tokens = float(capacity)
+        self.last: Optional[float] = None
+    
+    def _refill(self, now: float) -> None:
+        last = self.last
+        if last is not None and now > last:
+            tokens = self.tokens + (now - last) * self.rate
+            self.tokens = tokens if tokens < self.capacity else float(self.capacity)
+        self.last = now
+    
+    def available(self, now: float) -> float:
+        """Nombre de jetons disponibles à l'instant `now`."""
+        self._refill(now)
+        return self.tokens
+    
+    def consume(self, now: float) -> None:
+        """Consomme un jeton (à n'appeler qu'après `available(now) >= 1`)."""
+        self._refill(now)
+        self.tokens -= 1
+    
+    def wait_time(self, now: float) -> float:
+        """Temps avant qu'un jeton soit disponible."""
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
 
 @dataclass
 class RateLimitConfig:
@@ -22,19 +330,32 @@ class RateLimitConfig:
     Configuration du rate limiting pour une source API.
     
     Toutes les limites sont optionnelles. Si None, la limite n'est pas appliquée.
+    
+    `algorithm` choisit l'algorithme d'admission :
+    - "sliding_window" (défaut) : fenêtres glissantes strictes
+    - "token_bucket" : un token bucket par limite, décision en O(1), rafales autorisées
+    
+    `max_concurrent` plafonne le nombre de requêtes en vol (APIs limitant les
+    connexions simultanées), via `RateLimiter.acquire_concurrent` / `release`.
     """
     requests_per_minute: Optional[int] = None
     requests_per_hour: Optional[int] = None
     requests_per_day: Optional[int] = None
+    algorithm: str = "sliding_window"
+    max_concurrent: Optional[int] = None
     
     def __post_init__(self):
         """Valide la configuration."""
+        if self.algorithm not in ("sliding_window", "token_bucket"):
+            raise ValueError("algorithm must be 'sliding_window' or 'token_bucket'")
         if self.requests_per_minute is not None and self.requests_per_minute <= 0:
             raise ValueError("requests_per_minute must be positive")
         if self.requests_per_hour is not None and self.requests_per_hour <= 0:
             raise ValueError("requests_per_hour must be positive")
         if self.requests_per_day is not None and self.requests_per_day <= 0:
             raise ValueError("requests_per_day must be positive")
+        if self.max_concurrent is not None and self.max_concurrent <= 0:
+            raise ValueError("max_concurrent must be positive")
 
 
 class RateLimiter:
@@ -44,18 +365,26 @@ class RateLimiter:
     Gère les limites de requêtes par minute, heure ou jour pour différentes sources API.
     Supporte la persistance de l'état entre les runs (optionnel).
     
-    Algorithme : Sliding Window
-    - Maintient un deque des timestamps des requêtes
-    - Nettoie automatiquement les timestamps expirés
+    Algorithme :
+    - Minute : sliding window exact (`TimestampWindow`, timestamps de la dernière minute)
+    - Heure / jour : sliding window counter (`BucketedWindow`, 60 tranches d'une minute
+      et 24 tranches d'une heure), mémoire constante quel que soit le volume
     - Calcule le temps d'attente basé sur la fenêtre la plus restrictive
     """
     
+    # Durées des fenêtres (secondes)
+    MINUTE_WINDOW = 60
+    # Découpage des fenêtres bucketisées : (durée de la fenêtre, nombre de tranches)
+    HOUR_WINDOW = (3600, 60)
+    DAY_WINDOW = (86400, 24)
+    
     def __init__(
         self,
         config: Optional[RateLimitConfig] = None,
         source_name: Optional[str] = None,
         persist_state: bool = False,
-        state_file: Optional[str] = None
+        state_file: Optional[str] = None,
+        save_interval: float = 5.0
     ):
         """
         Initialise le rate limiter.
@@ -65,43 +394,273 @@ class RateLimiter:
             source_name: Nom de la source API (pour multi-source)
             persist_state: Si True, persiste l'état entre les runs
             state_file: Chemin du fichier de persistance (défaut: .rate_limiter_state.json)
+            save_interval: Délai minimum (secondes) entre deux écritures de l'état
         """
         self.config = config
         self.source_name = source_name or "default"
         self.persist_state = persist_state
         self.state_file = state_file or ".rate_limiter_state.json"
+        self.save_interval = save_interval
+        
+        # Écritures de l'état différées (au plus une par save_interval, hors event loop)
+        self._dirty = False
+        self._last_save = float('-inf')
+        self._save_task: Optional[asyncio.Task] = None
+        # Version des snapshots : une écriture plus ancienne n'écrase jamais une plus récente
+        self._state_version = 0
+        self._written_version = 0
+        self._write_lock = threading.Lock()
+        
+        # Mode sliding window avec limite par minute : seuls les `limite` derniers
+        # timestamps comptent pour l'admission, la fenêtre minute est bornée à cette taille
+        self._minute_maxlen = (
+            config.requests_per_minute
+            if config and config.algorithm == "sliding_window" else None
+        )
+        # {source_name: TimestampWindow} (timestamps exacts de la dernière minute)
+        self.minute_windows: Dict[str, TimestampWindow] = defaultdict(
+            lambda: TimestampWindow(self.MINUTE_WINDOW, self._minute_maxlen)
+        )
+        # {source_name: BucketedWindow}
+        self.hour_windows: Dict[str, BucketedWindow] = defaultdict(
+            lambda: BucketedWindow(*self.HOUR_WINDOW)
+        )
+        self.day_windows: Dict[str, BucketedWindow] = defaultdict(
+            lambda: BucketedWindow(*self.DAY_WINDOW)
+        )
+        
+        # Limites configurées, précalculées : (limite, durée, libellé, fenêtres par source).
+        # Une limite absente (None) n'apparaît pas et ne coûte donc rien par appel.
+        self._windows = tuple(
+            (limit, window, label, store)
+            for limit, window, label, store in (
+                (config.requests_per_minute, self.MINUTE_WINDOW, 'minute', self.minute_windows),
+                (config.requests_per_hour, self.HOUR_WINDOW[0], 'hour', self.hour_windows),
+                (config.requests_per_day, self.DAY_WINDOW[0], 'day', self.day_windows)
+            )
+            if limit
+        ) if config else ()
+        
+        # {source_name: [TokenBucket]} (algorithm="token_bucket" uniquement)
+        self.token_buckets: Dict[str, List[TokenBucket]] = defaultdict(self._new_token_buckets)
+        self._use_token_bucket = bool(config) and config.algorithm == "token_bucket"
+        # Fenêtre minute non bornée (token bucket, pas de limite par minute) : purge à
+        # l'enregistrement pour que sa mémoire reste limitée à une minute de requêtes
+        self._prune_on_record = self._minute_maxlen is None
         
-        # {source_name: deque(timestamps)}
-        self.request_times: Dict[str, deque] = defaultdict(deque)
+        # Files d'attente des appelants bloqués par une limite, une par source
+        # (le fast path ne les prend pas ; deux sources ne s'attendent jamais)
+        self._locks: Dict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
         
-        # Lock pour la thread-safety
-        self._lock = asyncio.Lock()
+        # {source_name: instant monotonic} avant lequel le serveur a demandé d'attendre
+        self._forced_wait_until: Dict[str, float] = {}
         
-        # Charger l'état persistant si activé
-        if persist_state:
+        # Identifiants des requêtes en vol (config.max_concurrent uniquement)
+        self._inflight: Set[str] = set()
+        self._max_concurrent = config.max_concurrent if config else None
+        self._inflight_changed = asyncio.Condition()
+        
+        if config is None:
+            # Aucune limite : rien à enregistrer ni à persister, les appels sont des no-ops
+            self.persist_state = False
+            self._specialize_unlimited()
+        elif persist_state:
+            # Charger l'état persistant si activé
             self._load_state()
+            _PERSISTENT_LIMITERS.add(self)
         
         logger.info(f"Initialized RateLimiter for source '{self.source_name}'")
     
+    def _specialize_unlimited(self) -> None:
+        """
+        Remplace `acquire`, `can_proceed` et `wait_if_needed` par des no-ops sur l'instance.
+        
+        Un limiteur sans configuration ne fait alors plus aucun travail par appel. Une
+        pause imposée par le serveur (`update_from_headers`) rétablit les méthodes de la
+        classe, qui savent l'appliquer.
+        """
+        self.acquire = self._acquire_noop
+        self.can_proceed = self._can_proceed_noop
+        self.wait_if_needed = self._acquire_noop
+    
+    async def _acquire_noop(self, source_name: Optional[str] = None) -> None:
+        return None
+    
+    def _can_proceed_noop(
+        self,
+        source_name: Optional[str] = None,
+        now: Optional[float] = None
+    ) -> bool:
+        return True
+    
     async def acquire(self, source_name: Optional[str] = None) -> None:
         """
         Attend si nécessaire pour respecter les limites, puis enregistre la requête.
         
         Cette méthode bloque jusqu'à ce qu'une requête puisse être effectuée.
         
+        Fast path : si personne n'attend et que les limites le permettent, la requête
+        est enregistrée sans prendre le lock (vérification + enregistrement sans `await`
+        entre les deux, donc atomiques pour l'event loop). Sinon l'appelant rejoint la
+        file d'attente de sa source, servie dans l'ordre d'arrivée.
+        
         Args:
             source_name: Nom de la source (si None, utilise self.source_name)
         """
         source = source_name or self.source_name
+        lock = self._locks[source]
         
-        async with self._lock:
+        if not lock.locked():
+            now = time.monotonic()
+            if self.can_proceed(source, now):
+                self._record_request(source, now)
+                return
+        
+        async with lock:
             await self.wait_if_needed(source)
-            self.request_times[source].append(time.time())
-            self._clean_old_requests(source)
+            self._record_request(source, time.monotonic())
+    
+    async def acquire_concurrent(self, source_name: Optional[str] = None) -> str:
+        """
+        Réserve une place parmi les requêtes en vol, puis applique `acquire`.
+        
+        Sans `max_concurrent` configuré, équivaut à `acquire` (l'identifiant est tout
+        de même retourné). Chaque appel doit être suivi de `release(req_id)`.
+        
+        Args:
+            source_name: Nom de la source (si None, utilise self.source_name)
             
-            # Sauvegarder l'état si activé
-            if self.persist_state:
-                self._save_state()
+        Returns:
+            Identifiant unique de la requête, à passer à `release`
+        """
+        req_id = uuid.uuid4().hex
+        if self._max_concurrent:
+            async with self._inflight_changed:
+                await self._inflight_changed.wait_for(
+                    lambda: len(self._inflight) < self._max_concurrent
+                )
+                self._inflight.add(req_id)
+        
+        try:
+            await self.acquire(source_name)
+        except BaseException:
+            await self.release(req_id)
+            raise
+        return req_id
+    
+    async def release(self, req_id: str) -> None:
+        """
+        Libère la place d'une requête terminée et réveille les appelants en attente.
+        
+        Args:
+            req_id: Identifiant retourné par `acquire_concurrent`
+        """
+        if req_id not in self._inflight:
+            return
+        async with self._inflight_changed:
+            self._inflight.discard(req_id)
+            self._inflight_changed.notify()
+    
+    def _new_token_buckets(self) -> List[TokenBucket]:
+        """Crée les token buckets d'une source à partir de la configuration."""
+        return [TokenBucket(limit, window) for limit, window, _, _ in self._windows]
+    
+    def _record_request(self, source: str, now: float) -> None:
+        """Enregistre une requête admise dans toutes les fenêtres de la source."""
+        if self._use_token_bucket:
+            for bucket in self.token_buckets[source]:
+                bucket.consume(now)
+        
+        # Les fenêtres restent alimentées pour get_stats, quel que soit l'algorithme
+        self.minute_windows[source].add(now)
+        self.hour_windows[source].add(now)
+        self.day_windows[source].add(now)
+        if self._prune_on_record:
+            self._advance_cursors(source, now)
+        
+        # Sauvegarder l'état si activé (écriture différée)
+        if self.persist_state:
+            self._dirty = True
+            self._schedule_save(now)
+    
+    def update_from_headers(
+        self,
+        headers: Mapping[str, str],
+        source_name: Optional[str] = None
+    ) -> None:
+        """
+        Ajuste le limiteur à l'état de quota annoncé par le serveur.
+        
+        - `Retry-After` : aucune requête avant l'expiration du délai
+        - `X-RateLimit-Remaining` (ou `anthropic-ratelimit-requests-remaining`) sous
+          10 % de la limite : pause jusqu'à `X-RateLimit-Reset` si fourni ; sinon, si la
+          limite serveur est celle de la minute, la fenêtre minute est gonflée pour
+          refléter les requêtes déjà consommées, et à défaut pause de LOW_QUOTA_PAUSE
+        
+        Args:
+            headers: Headers de la réponse HTTP (insensibles à la casse pour aiohttp)
+            source_name: Nom de la source (si None, utilise self.source_name)
+        """
+        if not headers:
+            return
+        if not hasattr(headers, 'getall'):
+            # dict simple : normaliser la casse (les CIMultiDict d'aiohttp le font déjà)
+            headers = {key.lower(): value for key, value in headers.items()}
+        
+        source = source_name or self.source_name
+        now = time.monotonic()
+        unix_now = time.time()
+        
+        retry_after = _parse_delay(headers.get('retry-after'), unix_now)
+        if retry_after:
+            self._force_wait(source, now + retry_after)
+            logger.warning(f"Server requested '{source}' to retry after {retry_after:.1f}s")
+        
+        remaining = _first_header(headers, _REMAINING_HEADERS)
+        if remaining is None:
+            return
+        try:
+            remaining = int(float(remaining))
+            server_limit = _first_header(headers, _LIMIT_HEADERS)
+            server_limit = int(float(server_limit)) if server_limit is not None else None
+        except ValueError:
+            return
+        
+        minute_limit = self.config.requests_per_minute if self.config else None
+        limit = server_limit or minute_limit
+        if not limit or remaining >= LOW_REMAINING_RATIO * limit:
+            return
+        
+        reset = _parse_delay(_first_header(headers, _RESET_HEADERS), unix_now)
+        if reset:
+            self._force_wait(source, now + reset)
+            logger.info(
+                f"Server quota low for '{source}' ({remaining}/{limit}), "
+                f"pausing {reset:.1f}s until reset"
+            )
+        elif minute_limit and server_limit == minute_limit:
+            # Quota serveur par minute sans date de reset : aligner la fenêtre minute
+            # sur la consommation serveur (mêmes unités)
+            minute_window = self.minute_windows[source]
+            missing = max(minute_limit - remaining, 0) - minute_window.count(now)
+            for _ in range(missing):
+                minute_window.add(now)
+        else:
+            # Fenêtre serveur inconnue (souvent horaire ou journalière) : les compteurs
+            # ne sont pas comparables à la fenêtre minute, pause prudente
+            self._force_wait(source, now + LOW_QUOTA_PAUSE)
+            logger.info(
+                f"Server quota low for '{source}' ({remaining}/{limit}), "
+                f"pausing {LOW_QUOTA_PAUSE:.0f}s (no reset time provided)"
+            )
+    
+    def _force_wait(self, source: str, until: float) -> None:
+        """Interdit les requêtes de la source avant l'instant monotonic `until`."""
+        if until > self._forced_wait_until.get(source, 0.0):
+            self._forced_wait_until[source] = until
+            # Limiteur sans configuration : les no-ops ignoreraient la pause
+            for name in ('acquire', 'can_proceed', 'wait_if_needed'):
+                self.__dict__.pop(name, None)
     
     async def wait_if_needed(self, source_name: Optional[str] = None) -> None:
         """
@@ -112,158 +671,178 @@ class RateLimiter:
         """
         source = source_name or self.source_name
         
-        if not self.can_proceed(source):
-            wait_time = self._calculate_wait_time(source)
-            if wait_time > 0:
-                logger.info(
-                    f"Rate limit reached for '{source}', waiting {wait_time:.2f}s"
-                )
-                await asyncio.sleep(wait_time)
-                
-                # Vérifier à nouveau après l'attente
-                if not self.can_proceed(source):
-                    # Si toujours bloqué, recalculer et attendre à nouveau
-                    wait_time = self._calculate_wait_time(source)
-                    if wait_time > 0:
-                        logger.warning(
-                            f"Still rate limited for '{source}' after wait, "
-                            f"waiting additional {wait_time:.2f}s"
-                        )
-                        await asyncio.sleep(wait_time)
-    
-    def can_proceed(self, source_name: Optional[str] = None) -> bool:
+        # `_calculate_wait_time` est exact : une seule itération suffit en pratique,
+        # la boucle ne recalcule que si la source est réellement encore bloquée
+        while True:
+            wait_time = self._calculate_wait_time(source, time.monotonic())
+            if wait_time <= 0:
+                return
+            logger.info(
+                f"Rate limit reached for '{source}', waiting {wait_time:.2f}s"
+            )
+            await asyncio.sleep(wait_time)
+    
+    def can_proceed(
+        self,
+        source_name: Optional[str] = None,
+        now: Optional[float] = None
+    ) -> bool:
         """
         Vérifie si une nouvelle requête peut être effectuée pour la source donnée.
         
         Args:
             source_name: Nom de la source (si None, utilise self.source_name)
+            now: Instant `time.monotonic()` de référence (si None, lu ici)
             
         Returns:
             True si on peut procéder, False sinon
         """
         source = source_name or self.source_name
         
+        if now is None:
+            now = time.monotonic()
+        
+        # Pause imposée par le serveur (Retry-After, quota restant épuisé)
+        forced_until = self._forced_wait_until.get(source)
+        if forced_until is not None and forced_until > now:
+            return False
+        
         # Si pas de config, autoriser toutes les requêtes
         if not self.config:
             return True
         
-        now = time.time()
-        self._clean_old_requests(source)
-        request_times = self.request_times[source]
-        
-        # Vérifier limite par minute
-        if self.config.requests_per_minute:
-            recent_minute = [t for t in request_times if now - t < 60]
-            if len(recent_minute) >= self.config.requests_per_minute:
-                logger.debug(
-                    f"Rate limit per minute reached for '{source}': "
-                    f"{len(recent_minute)}/{self.config.requests_per_minute}"
-                )
-                return False
-        
-        # Vérifier limite par heure
-        if self.config.requests_per_hour:
-            recent_hour = [t for t in request_times if now - t < 3600]
-            if len(recent_hour) >= self.config.requests_per_hour:
-                logger.debug(
-                    f"Rate limit per hour reached for '{source}': "
-                    f"{len(recent_hour)}/{self.config.requests_per_hour}"
-                )
-                return False
+        if self._use_token_bucket:
+            return all(bucket.available(now) >= 1 for bucket in self.token_buckets[source])
         
-        # Vérifier limite par jour
-        if self.config.requests_per_day:
-            recent_day = [t for t in request_times if now - t < 86400]
-            if len(recent_day) >= self.config.requests_per_day:
+        for limit, _, label, store in self._windows:
+            if store[source].is_full(now, limit):
                 logger.debug(
-                    f"Rate limit per day reached for '{source}': "
-                    f"{len(recent_day)}/{self.config.requests_per_day}"
+                    f"Rate limit per {label} reached for '{source}': "
+                    f"{store[source].count(now)}/{limit}"
                 )
                 return False
         
         return True
     
-    def _calculate_wait_time(self, source_name: Optional[str] = None) -> float:
+    def _calculate_wait_time(
+        self,
+        source_name: Optional[str] = None,
+        now: Optional[float] = None
+    ) -> float:
         """
         Calcule le temps d'attente nécessaire pour la source donnée.
         
         Args:
             source_name: Nom de la source (si None, utilise self.source_name)
+            now: Instant `time.monotonic()` de référence (si None, lu ici)
             
         Returns:
             Temps d'attente en secondes (minimum 0.1 pour éviter les requêtes trop rapides)
         """
         source = source_name or self.source_name
         
-        if not self.config:
-            return 0.0
-        
-        request_times = self.request_times[source]
-        if not request_times:
-            return 0.0
-        
-        now = time.time()
-        wait_times = []
+        if now is None:
+            now = time.monotonic()
         
-        # Limite par minute
-        if self.config.requests_per_minute:
-            recent_minute = [t for t in request_times if now - t < 60]
-            if len(recent_minute) >= self.config.requests_per_minute:
-                # Attendre jusqu'à ce que la plus ancienne requête sorte de la fenêtre
-                oldest_in_minute = min(recent_minute)
-                wait_time_minute = 60 - (now - oldest_in_minute) + 0.1  # +0.1 pour sécurité
-                wait_times.append(wait_time_minute)
+        forced_wait = self._forced_wait_until.get(source, now) - now
         
-        # Limite par heure
-        if self.config.requests_per_hour:
-            recent_hour = [t for t in request_times if now - t < 3600]
-            if len(recent_hour) >= self.config.requests_per_hour:
-                oldest_in_hour = min(recent_hour)
-                wait_time_hour = 3600 - (now - oldest_in_hour) + 0.1
-                wait_times.append(wait_time_hour)
+        if not self.config:
+            return max(forced_wait, 0.0)
         
-        # Limite par jour
-        if self.config.requests_per_day:
-            recent_day = [t for t in request_times if now - t < 86400]
-            if len(recent_day) >= self.config.requests_per_day:
-                oldest_in_day = min(recent_day)
-                wait_time_day = 86400 - (now - oldest_in_day) + 0.1
-                wait_times.append(wait_time_day)
+        if self._use_token_bucket:
+            wait_time = max(
+                (bucket.wait_time(now) for bucket in self.token_buckets[source]),
+                default=0.0
+            )
+        else:
+            # Attendre que la fenêtre la plus restrictive repasse sous sa limite
+            wait_time = max(
+                (store[source].wait_time(now, limit) for limit, _, _, store in self._windows),
+                default=0.0
+            )
+        wait_time = wait_time + 0.1 if wait_time > 0 else 0.0  # +0.1 pour sécurité
+        return max(wait_time, forced_wait)
+    
+    def _advance_cursors(self, source: str, now: float) -> None:
+        """
+        Purge la fenêtre minute de la source jusqu'à `now`.
         
-        return max(wait_times) if wait_times else 0.0
+        Les compteurs par tranches avancent d'eux-mêmes à chaque ajout ; la fenêtre
+        minute est purgée par son comptage, sauf quand l'admission ne la compte pas.
+        """
+        self.minute_windows[source].prune(now)
     
-    def _clean_old_requests(self, source_name: Optional[str] = None) -> None:
+    def _schedule_save(self, now: float) -> None:
         """
-        Supprime les timestamps trop anciens pour la source donnée.
+        Programme une écriture de l'état dans un thread si `save_interval` est écoulé.
         
-        Args:
-            source_name: Nom de la source (si None, utilise self.source_name)
+        L'état est capturé sur l'event loop (pas de mutation concurrente) ; seule
+        la sérialisation et l'écriture disque partent dans le thread pool.
         """
-        source = source_name or self.source_name
-        now = time.time()
-        max_age = 86400  # 24 heures (pour la limite journalière)
+        if now - self._last_save < self.save_interval:
+            return
+        if self._save_task is not None and not self._save_task.done():
+            return
         
-        request_times = self.request_times[source]
-        while request_times and (now - request_times[0]) > max_age:
-            request_times.popleft()
+        self._last_save = now
+        self._dirty = False
+        self._state_version += 1
+        state = self._build_state()
+        self._save_task = asyncio.get_running_loop().create_task(
+            asyncio.to_thread(self._write_state, state, self._state_version)
+        )
+    
+    def flush(self) -> None:
+        """Écrit immédiatement l'état s'il a changé depuis la dernière sauvegarde."""
+        if self.persist_state and self._dirty:
+            self._save_state()
+    
+    def _build_state(self) -> Dict[str, Any]:
+        """Construit l'état sérialisable (timestamps convertis en temps Unix)."""
+        # Convertir les timestamps monotoniques en temps Unix (valables entre les runs)
+        offset = time.time() - time.monotonic()
+        return {
+            source: {
+                'minute': [t + offset for t in self.minute_windows[source].times],
+                'hour': self.hour_windows[source].to_state(offset),
+                'day': self.day_windows[source].to_state(offset),
+                'tokens': [
+                    [bucket.tokens, bucket.last + offset]
+                    for bucket in self.token_buckets.get(source, [])
+                    if bucket.last is not None
+                ]
+            }
+            for source in set(self.minute_windows) | set(self.hour_windows)
+        }
+    
+    def _write_state(self, state: Dict[str, Any], version: int) -> None:
+        """Écrit l'état de manière atomique (fichier temporaire puis `os.replace`)."""
+        with self._write_lock:
+            if version <= self._written_version:
+                return  # Un snapshot plus récent a déjà été écrit
+            
+            try:
+                tmp_file = f"{self.state_file}.tmp"
+                with open(tmp_file, 'wb') as f:
+                    f.write(_dumps_state(state))
+                    f.flush()
+                    # Contenu sur disque avant le rename : pas de fichier vide après un crash
+                    os.fsync(f.fileno())
+                os.replace(tmp_file, self.state_file)
+                self._written_version = version
+                
+                logger.debug(f"Saved rate limiter state to {self.state_file}")
+            except Exception as e:
+                logger.warning(f"Failed to save rate limiter state: {e}")
     
     def _save_state(self) -> None:
-        """Sauvegarde l'état du rate limiter dans un fichier."""
+        """Sauvegarde immédiatement (et de manière synchrone) l'état du rate limiter."""
         if not self.persist_state:
             return
         
-        try:
-            state = {
-                source: list(times)
-                for source, times in self.request_times.items()
-            }
-            
-            with open(self.state_file, 'w') as f:
-                json.dump(state, f)
-            
-            logger.debug(f"Saved rate limiter state to {self.state_file}")
-        except Exception as e:
-            logger.warning(f"Failed to save rate limiter state: {e}")
+        self._dirty = False
+        self._state_version += 1
+        self._write_state(self._build_state(), self._state_version)
     
     def _load_state(self) -> None:
         """Charge l'état du rate limiter depuis un fichier."""
@@ -271,46 +850,92 @@ class RateLimiter:
             return
         
         try:
-            with open(self.state_file, 'r') as f:
-                state = json.load(f)
+            with open(self.state_file, 'rb') as f:
+                state = _loads_state(f.read())
             
-            # Convertir les listes en deques et nettoyer les timestamps expirés
+            # Repasser en temps monotonique et ignorer les entrées expirées
             now = time.time()
-            max_age = 86400
+            now_monotonic = time.monotonic()
+            offset = now - now_monotonic
             
-            for source, times in state.items():
-                # Filtrer les timestamps expirés
-                valid_times = [t for t in times if now - t < max_age]
-                if valid_times:
-                    self.request_times[source] = deque(valid_times)
+            for source, source_state in state.items():
+                if isinstance(source_state, list):
+                    # Ancien format : liste brute de timestamps Unix (toutes fenêtres)
+                    self._load_timestamps(source, source_state, offset, now, fill_windows=True)
+                    continue
+                
+                self._load_timestamps(source, source_state.get('minute', []), offset, now)
+                self.hour_windows[source].load_state(
+                    source_state.get('hour', []), offset, now_monotonic
+                )
+                self.day_windows[source].load_state(
+                    source_state.get('day', []), offset, now_monotonic
+                )
+                tokens_state = source_state.get('tokens')
+                if self._use_token_bucket and tokens_state:
+                    for bucket, (tokens, last) in zip(self.token_buckets[source], tokens_state):
+                        bucket.tokens = tokens
+                        bucket.last = last - offset
             
             logger.info(f"Loaded rate limiter state from {self.state_file}")
         except Exception as e:
             logger.warning(f"Failed to load rate limiter state: {e}")
     
-    def get_stats(self, source_name: Optional[str] = None) -> Dict[str, int]:
+    def _load_timestamps(
+        self,
+        source: str,
+        times: List[float],
+        offset: float,
+        now: float,
+        fill_windows: bool = False
+    ) -> None:
+        """
+        Réinjecte des timestamps Unix persistés dans la fenêtre minute.
+        
+        Si `fill_windows` est True, les timestamps alimentent aussi les compteurs
+        heure/jour (reprise d'un fichier d'état de l'ancien format).
+        """
+        minute_times = array('d')
+        for t in times:
+            if now - t >= 86400:
+                continue
+            t_monotonic = t - offset
+            if fill_windows:
+                self.hour_windows[source].add(t_monotonic)
+                self.day_windows[source].add(t_monotonic)
+            if now - t < 60:
+                minute_times.append(t_monotonic)
+        if minute_times:
+            if self._minute_maxlen:
+                del minute_times[:-self._minute_maxlen]
+            self.minute_windows[source].times = minute_times
+    
+    def get_stats(
+        self,
+        source_name: Optional[str] = None,
+        now: Optional[float] = None
+    ) -> Dict[str, int]:
         """
         Retourne les statistiques d'utilisation pour la source donnée.
         
         Args:
             source_name: Nom de la source (si None, utilise self.source_name)
+            now: Instant `time.monotonic()` de référence (si None, lu ici)
             
         Returns:
             Dict avec les compteurs pour minute, heure, jour
         """
         source = source_name or self.source_name
-        now = time.time()
-        request_times = self.request_times[source]
-        
-        recent_minute = [t for t in request_times if now - t < 60]
-        recent_hour = [t for t in request_times if now - t < 3600]
-        recent_day = [t for t in request_times if now - t < 86400]
+        if now is None:
+            now = time.monotonic()
+        requests_last_day = self.day_windows[source].count(now)
         
         return {
-            "requests_last_minute": len(recent_minute),
-            "requests_last_hour": len(recent_hour),
-            "requests_last_day": len(recent_day),
-            "total_requests_tracked": len(request_times)
+            "requests_last_minute": self.minute_windows[source].count(now),
+            "requests_last_hour": self.hour_windows[source].count(now),
+            "requests_last_day": requests_last_day,
+            # Historique conservé sur 24h : même périmètre que la fenêtre jour
+            "total_requests_tracked": requests_last_day
         }
     
     def reset(self, source_name: Optional[str] = None) -> None:
@@ -321,10 +946,18 @@ class RateLimiter:
             source_name: Nom de la source (si None, réinitialise toutes les sources)
         """
         if source_name:
-            self.request_times[source_name] = deque()
+            self.minute_windows.pop(source_name, None)
+            self.hour_windows.pop(source_name, None)
+            self.day_windows.pop(source_name, None)
+            self.token_buckets.pop(source_name, None)
+            self._forced_wait_until.pop(source_name, None)
             logger.info(f"Reset rate limiter for source '{source_name}'")
         else:
-            self.request_times.clear()
+            self.minute_windows.clear()
+            self.hour_windows.clear()
+            self.day_windows.clear()
+            self.token_buckets.clear()
+            self._forced_wait_until.clear()
             logger.info("Reset all rate limiter counters")
         
         if self.persist_state:
@@ -344,7 +977,8 @@ class MultiSourceRateLimiter:
         
         Args:
             persist_state: Si True, persiste l'état entre les runs
-            state_file: Chemin du fichier de persistance
+            state_file: Chemin de base des fichiers de persistance (un fichier par
+                source, ex: .rate_limiter_state.openweather.json)
         """
         # {source_name: RateLimiter}
         self.limiters: Dict[str, RateLimiter] = {}
@@ -366,11 +1000,14 @@ class MultiSourceRateLimiter:
             persist_state: Si True, persiste l'état (override global)
         """
         persist = persist_state if persist_state is not None else self.persist_state
+        # Chaque limiteur réécrit son fichier entier avec son seul état : un fichier
+        # par source, sinon seule la dernière source écrite survivrait au redémarrage
+        root, ext = os.path.splitext(self.state_file)
         self.limiters[source_name] = RateLimiter(
             config=config,
             source_name=source_name,
             persist_state=persist,
-            state_file=self.state_file
+            state_file=f"{root}.{source_name}{ext}"
         )
         logger.info(f"Added rate limiter for source '{source_name}'")
     
@@ -384,10 +1021,11 @@ class MultiSourceRateLimiter:
         Raises:
             KeyError: Si la source n'existe pas
         """
-        if source_name not in self.limiters:
+        limiter = self.limiters.get(source_name)
+        if limiter is None:
             raise KeyError(f"Rate limiter not configured for source '{source_name}'")
         
-        await self.limiters[source_name].acquire()
+        await limiter.acquire()
     
     def can_proceed(self, source_name: str) -> bool:
         """
@@ -399,10 +1037,11 @@ class MultiSourceRateLimiter:
         Returns:
             True si on peut procéder, False sinon
         """
-        if source_name not in self.limiters:
+        limiter = self.limiters.get(source_name)
+        if limiter is None:
             return True  # Pas de limite si non configuré
         
-        return self.limiters[source_name].can_proceed()
+        return limiter.can_proceed()
     
     def get_stats(self, source_name: Optional[str] = None) -> Dict:
         """
@@ -415,12 +1054,104 @@ class MultiSourceRateLimiter:
             Dict des statistiques
         """
         if source_name:
-            if source_name not in self.limiters:
-                return {}
-            return self.limiters[source_name].get_stats()
-        else:
-            return {
-                source: limiter.get_stats()
-                for source, limiter in self.limiters.items()
-            }
+            limiter = self.limiters.get(source_name)
+            return limiter.get_stats() if limiter else {}
+        
+        # Un seul instant de référence pour toutes les sources (stats cohérentes entre elles)
+        now = time.monotonic()
+        return {
+            source: limiter.get_stats(now=now)
+            for source, limiter in self.limiters.items()
+        }
 
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Limite le nombre de requêtes en vol avec un contrôleur AIMD.
+    
+    Complète le rate limiting (débit) par un plafond de concurrence auto-ajusté :
+    - succès avec latence moyenne (EWMA) sous `target_latency` : c = c + alpha
+    - réponse lente, 429 ou timeout : c = c * beta
+    
+    La limite `c` reste bornée entre `min_concurrency` et `max_concurrency`. Chaque
+    `acquire()` doit être suivi d'un `release(latency, ok)`.
+    """
+    
+    def __init__(
+        self,
+        initial_concurrency: int = 4,
+        min_concurrency: int = 1,
+        max_concurrency: int = 32,
+        target_latency: float = 2.0,
+        alpha: float = 0.5,
+        beta: float = 0.5,
+        ewma_weight: float = 0.2
+    ):
+        """
+        Initialise le contrôleur.
+        
+        Args:
+            initial_concurrency: Nombre initial de requêtes simultanées autorisées
+            min_concurrency: Plancher de la limite
+            max_concurrency: Plafond de la limite
+            target_latency: Latence moyenne (secondes) au-delà de laquelle on réduit
+            alpha: Incrément additif par succès
+            beta: Facteur multiplicatif de réduction (0 < beta < 1)
+            ewma_weight: Poids de la dernière latence dans la moyenne mobile
+        """
+        if not 1 <= min_concurrency <= initial_concurrency <= max_concurrency:
+            raise ValueError(
+                "Expected 1 <= min_concurrency <= initial_concurrency <= max_concurrency"
+            )
+        if not 0 < beta < 1:
+            raise ValueError("beta must be in (0, 1)")
+        
+        self._c_min = min_concurrency
+        self._c_max = max_concurrency
+        self._limit = float(initial_concurrency)
+        self._target_latency = target_latency
+        self._alpha = alpha
+        self._beta = beta
+        self._ewma_weight = ewma_weight
+        self._latency_ewma: Optional[float] = None
+        self._in_flight = 0
+        # La limite varie : un compteur + Condition remplace un Semaphore de taille fixe
+        self._condition = asyncio.Condition()
+    
+    @property
+    def limit(self) -> int:
+        """Nombre de requêtes simultanées actuellement autorisées."""
+        return int(self._limit)
+    
+    async def acquire(self) -> None:
+        """Attend qu'une place soit libre sous la limite courante."""
+        async with self._condition:
+            await self._condition.wait_for(lambda: self._in_flight < int(self._limit))
+            self._in_flight += 1
+    
+    async def release(self, latency: float, ok: bool = True) -> None:
+        """
+        Libère une place et ajuste la limite selon la réponse observée.
+        
+        Args:
+            latency: Durée de la requête (secondes)
+            ok: False pour un 429, un 503 ou un timeout
+        """
+        if self._latency_ewma is None:
+            self._latency_ewma = latency
+        else:
+            self._latency_ewma += self._ewma_weight * (latency - self._latency_ewma)
+        
+        if ok and self._latency_ewma <= self._target_latency:
+            self._limit = min(self._limit + self._alpha, float(self._c_max))
+        else:
+            self._limit = max(self._limit * self._beta, float(self._c_min))
+            logger.debug(
+                f"Concurrency reduced to {self.limit} "
+                f"(ok={ok}, latency EWMA {self._latency_ewma:.2f}s)"
+            )
+        
+        async with self._condition:
+            self._in_flight -= 1
+            self._condition.notify_all()
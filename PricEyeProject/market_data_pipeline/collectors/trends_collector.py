@@ -3,14 +3,17 @@ Collecteur de tendances marché (Google Trends, agrégations internes).
 """
 
 import asyncio
+import atexit
+import importlib.util
 import logging
-from typing import Dict, List, Optional, Any
-from datetime import date, datetime, timedelta
-
-import aiohttp
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
+from typing import Dict, List, Optional, Any, Tuple
+from datetime import date, datetime, timedelta, timezone
 
 from .base_collector import BaseCollector
 from ..config.settings import Settings
+from ..utils.cache import TTLCache
 
 logger = logging.getLogger(__name__)
 
@@ -22,13 +25,128 @@ except ImportError:
     SUPABASE_AVAILABLE = False
     logger.warning("Supabase client not available, internal aggregation will not work")
 
-# Import conditionnel de pandas pour Google Trends
+# Disponibilité de pandas pour Google Trends (utilisé via pytrends, jamais importé ici)
+PANDAS_AVAILABLE = importlib.util.find_spec('pandas') is not None
+if not PANDAS_AVAILABLE:
+    logger.warning("pandas not available, some features may not work")
+
+# Erreurs transitoires du client Supabase (httpx) justifiant un nouvel essai
 try:
-    import pandas as pd
-    PANDAS_AVAILABLE = True
+    import httpx
+    TRANSIENT_SUPABASE_ERRORS = (httpx.TransportError, TimeoutError, ConnectionError)
 except ImportError:
-    PANDAS_AVAILABLE = False
-    logger.warning("pandas not available, some features may not work")
+    TRANSIENT_SUPABASE_ERRORS = (TimeoutError, ConnectionError)
+
+# Thread pool dédié aux appels Supabase synchrones : le parallélisme des pages
+# (SUPABASE_MAX_CONCURRENCY) ne dépend pas de l'executor par défaut, partagé par tout
+# le process, et ne l'accapare pas. Les threads sont créés à la demande.
+_SUPABASE_EXECUTOR = ThreadPoolExecutor(max_workers=32, thread_name_prefix='supabase-io')
+atexit.register(_SUPABASE_EXECUTOR.shutdown, wait=False)
+
+# Import conditionnel de numpy (agrégation vectorisée des réservations)
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+
+@lru_cache(maxsize=128)
+def _build_keywords(keywords: Tuple[str, ...], city: str) -> Tuple[str, ...]:
+    """Mots-clés Google Trends formatés pour une ville (limités à 5 par pytrends)."""
+    return tuple(kw.format(city=city) for kw in keywords[:5])
+
+
+@lru_cache(maxsize=128)
+def _build_timeframe(start_date: date, end_date: date) -> str:
+    """Timeframe pytrends 'YYYY-MM-DD YYYY-MM-DD'."""
+    return f"{start_date.strftime('%Y-%m-%d')} {end_date.strftime('%Y-%m-%d')}"
+
+
+def _parse_day(value: Any) -> date:
+    """Convertit une date Supabase ('YYYY-MM-DD' ou timestamp ISO) en `date`."""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(value[:10])
+
+
+def _copy_records(records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Copie des records de tendances (dict, métadonnées et mots-clés compris).
+    
+    Les records mis en cache par collect() ne sont jamais remis tels quels à
+    l'appelant : les modifier (ex: enrichissement) n'altère pas le cache.
+    """
+    return [
+        {**record, 'metadata': dict(record['metadata']), 'keywords': list(record['keywords'])}
+        for record in records
+    ]
+
+
+def _daily_booking_counts(
+    bookings: List[Dict[str, Any]],
+    start_date: date,
+    n_days: int
+) -> List[int]:
+    """
+    Compte, pour chaque jour de la plage, les réservations qui le couvrent.
+    
+    Balayage par différences : +1 au premier jour couvert, -1 au lendemain du
+    dernier, puis somme cumulée. O(réservations + jours) au lieu d'une requête
+    par jour. Vectorisé avec numpy si disponible.
+    """
+    if NUMPY_AVAILABLE:
+        return _daily_booking_counts_numpy(bookings, start_date, n_days)
+    
+    deltas = [0] * (n_days + 1)
+    for booking in bookings:
+        booking_start = booking.get('start_date')
+        booking_end = booking.get('end_date')
+        if not booking_start or not booking_end:
+            continue
+        first = max((_parse_day(booking_start) - start_date).days, 0)
+        last = min((_parse_day(booking_end) - start_date).days, n_days - 1)
+        if first <= last:
+            deltas[first] += 1
+            deltas[last + 1] -= 1
+    
+    counts = []
+    running = 0
+    for delta in deltas[:n_days]:
+        running += delta
+        counts.append(running)
+    return counts
+
+
+def _daily_booking_counts_numpy(
+    bookings: List[Dict[str, Any]],
+    start_date: date,
+    n_days: int
+) -> List[int]:
+    """Version numpy de `_daily_booking_counts` (parsing et balayage en C)."""
+    intervals = [
+        (str(booking['start_date'])[:10], str(booking['end_date'])[:10])
+        for booking in bookings
+        if booking.get('start_date') and booking.get('end_date')
+    ]
+    if not intervals:
+        return [0] * n_days
+    
+    # Dates ISO -> jours depuis start_date, en une conversion vectorisée
+    days = np.array(intervals, dtype='datetime64[D]') - np.datetime64(start_date, 'D')
+    days = days.astype(np.int64)
+    first = np.maximum(days[:, 0], 0)
+    last = np.minimum(days[:, 1], n_days - 1)
+    covered = first <= last
+    
+    # +1 au premier jour, -1 au lendemain du dernier (bincount : add.at sans doublons lents)
+    deltas = (
+        np.bincount(first[covered], minlength=n_days + 1)
+        - np.bincount(last[covered] + 1, minlength=n_days + 1)
+    )
+    return np.cumsum(deltas[:n_days]).tolist()
 
 
 class TrendsCollector(BaseCollector):
@@ -48,12 +166,37 @@ class TrendsCollector(BaseCollector):
         "{city} travel"
     ]
     
+    # Taille de page des lectures Supabase (plafond par défaut de PostgREST)
+    SUPABASE_PAGE_SIZE = 1000
+    # Nombre maximum de pages Supabase récupérées simultanément
+    SUPABASE_MAX_CONCURRENCY = 16
+    # Durée de conservation des réponses Google Trends (secondes)
+    GOOGLE_TRENDS_CACHE_TTL = 3600
+    # Durée de conservation des résultats complets de collect() (secondes)
+    COLLECT_CACHE_TTL = 3600
+    # Durée de conservation des identifiants de propriétés par ville (secondes)
+    PROPERTY_IDS_CACHE_TTL = 300
+    # Nombre de records par upsert Supabase
+    STORAGE_BATCH_SIZE = 500
+    # Fonction Postgres joignant bookings et properties côté serveur (optionnelle) :
+    #   create function get_city_bookings(p_city text, p_country text, p_start date, p_end date)
+    #   returns table (start_date date, end_date date) language sql stable as $$
+    #     select b.start_date, b.end_date from bookings b
+    #     join properties p on p.id = b.property_id
+    #     where p.city = p_city and p.country = p_country
+    #       and b.start_date <= p_end and b.end_date >= p_start
+    #   $$;
+    CITY_BOOKINGS_RPC = 'get_city_bookings'
+    # Au-delà de ce nombre de réservations, l'agrégation par jour quitte l'event loop
+    LARGE_SWEEP_THRESHOLD = 50000
+    
     def __init__(
         self,
         primary_source: str = "google_trends",
         fallback_source: Optional[str] = "internal_aggregation",
         api_key: Optional[str] = None,
         keywords: Optional[List[str]] = None,
+        include_raw_data: bool = False,
         **kwargs
     ):
         """
@@ -64,11 +207,14 @@ class TrendsCollector(BaseCollector):
             fallback_source: Source de fallback (None pour désactiver)
             api_key: Clé API (non utilisé pour Google Trends)
             keywords: Liste de mots-clés personnalisés (None = utiliser DEFAULT_KEYWORDS)
+            include_raw_data: Si True, chaque record normalisé embarque l'item brut
+                ('raw_data'), ce qui double sa taille en mémoire et sur le réseau
             **kwargs: Arguments additionnels pour BaseCollector
         """
         self.primary_source = primary_source.lower()
         self.fallback_source = fallback_source.lower() if fallback_source else None
         self.keywords = keywords or self.DEFAULT_KEYWORDS
+        self.include_raw_data = include_raw_data
         
         super().__init__(
             source_name=f"trends_{self.primary_source}",
@@ -76,6 +222,20 @@ class TrendsCollector(BaseCollector):
             **kwargs
         )
         
+        # None tant que la fonction CITY_BOOKINGS_RPC n'a pas été essayée
+        self._city_bookings_rpc_available: Optional[bool] = None
+        
+        # Client pytrends (lazy init, réutilisé entre les appels). Son état de requête
+        # (build_payload) est partagé : un seul appel Google à la fois par collecteur
+        self._pytrends: Optional[Any] = None
+        self._pytrends_lock = asyncio.Lock()
+        # {(mots-clés, geo, timeframe): DataFrame interest_over_time}
+        self._trends_cache = TTLCache(maxsize=256, ttl=self.GOOGLE_TRENDS_CACHE_TTL)
+        # {(ville, pays, début, fin, store_in_db): tendances normalisées}
+        self._collect_cache = TTLCache(maxsize=256, ttl=self.COLLECT_CACHE_TTL)
+        # {(ville, pays): identifiants des propriétés} (l'inventaire évolue lentement)
+        self._property_ids_cache = TTLCache(maxsize=1024, ttl=self.PROPERTY_IDS_CACHE_TTL)
+        
         logger.info(
             f"Initialized TrendsCollector (primary: {self.primary_source}, "
             f"fallback: {self.fallback_source})"
@@ -99,6 +259,10 @@ class TrendsCollector(BaseCollector):
             
         Returns:
             Liste de tendances normalisées
+            
+        Les résultats non vides sont conservés COLLECT_CACHE_TTL secondes : un nouvel
+        appel identique ne refait ni requête ni stockage. Chaque appel reçoit ses propres
+        copies des records (le cache n'est pas exposé).
         """
         # Date range par défaut : aujourd'hui - 90 jours
         if not date_range:
@@ -108,9 +272,16 @@ class TrendsCollector(BaseCollector):
                 'end_date': today
             }
         
+        cache_key = (
+            city, country, date_range['start_date'], date_range['end_date'], store_in_db
+        )
+        cached = self._collect_cache.get(cache_key)
+        if cached is not None:
+            logger.debug(f"Trends cache hit for {city}, {country}")
+            return _copy_records(cached)
+        
         # Initialiser la session si nécessaire
-        if not self.session:
-            self.session = aiohttp.ClientSession()
+        self._ensure_session()
         
         try:
             # Rate limiting
@@ -123,15 +294,19 @@ class TrendsCollector(BaseCollector):
             # Normalisation
             normalized_data = self._normalize(raw_data, city, country, date_range)
             
-            # Stockage
+            # Stockage (upserts par lots, une requête par STORAGE_BATCH_SIZE records)
             if store_in_db and normalized_data:
-                await self._store_raw_data(normalized_data)
+                await self._store_raw_data(normalized_data, batch_size=self.STORAGE_BATCH_SIZE)
             
             logger.info(
                 f"Collected {len(normalized_data)} trends data points for {city}, {country}"
             )
             
-            return normalized_data
+            # Ne pas mettre en cache un échec de toutes les sources (liste vide)
+            if normalized_data:
+                self._collect_cache.set(cache_key, normalized_data)
+            
+            return _copy_records(normalized_data)
             
         except Exception as e:
             logger.error(f"Error collecting trends for {city}, {country}: {e}", exc_info=True)
@@ -196,21 +371,44 @@ class TrendsCollector(BaseCollector):
             raise ImportError("pytrends package required for Google Trends")
         
         try:
-            # Initialiser pytrends
-            pytrends = TrendReq(hl='fr', tz=360)  # Français, UTC+1
+            loop = asyncio.get_running_loop()
             
-            # Préparer les mots-clés avec la ville
-            keywords_list = [kw.format(city=city) for kw in self.keywords[:5]]  # Limiter à 5 mots-clés
+            # Préparer les mots-clés avec la ville (formatage mémoïsé par ville)
+            keywords = _build_keywords(tuple(self.keywords), city)
+            keywords_list = list(keywords)
+            geo = f"{country}-{city}"  # Format: FR-Paris (peut nécessiter ajustement)
+            timeframe = _build_timeframe(date_range['start_date'], date_range['end_date'])
             
-            # Construire la requête
-            pytrends.build_payload(
-                kw_list=keywords_list,
-                geo=f"{country}-{city}",  # Format: FR-Paris (peut nécessiter ajustement)
-                timeframe=f"{date_range['start_date'].strftime('%Y-%m-%d')} {date_range['end_date'].strftime('%Y-%m-%d')}"
-            )
+            cache_key = (keywords, geo, timeframe)
+            interest_over_time = self._trends_cache.get(cache_key)
             
-            # Récupérer les données d'intérêt au fil du temps
-            interest_over_time = pytrends.interest_over_time()
+            if interest_over_time is None:
+                # pytrends est synchrone (requests) : appels exécutés hors de l'event loop
+                async with self._pytrends_lock:
+                    # Initialiser pytrends une seule fois (handshake cookies Google coûteux)
+                    if self._pytrends is None:
+                        self._pytrends = await loop.run_in_executor(
+                            None,
+                            partial(TrendReq, hl='fr', tz=360)  # Français, UTC+1
+                        )
+                    
+                    # Construire la requête
+                    await loop.run_in_executor(
+                        None,
+                        partial(
+                            self._pytrends.build_payload,
+                            kw_list=keywords_list,
+                            geo=geo,
+                            timeframe=timeframe
+                        )
+                    )
+                    
+                    # Récupérer les données d'intérêt au fil du temps
+                    interest_over_time = await loop.run_in_executor(
+                        None,
+                        self._pytrends.interest_over_time
+                    )
+                self._trends_cache.set(cache_key, interest_over_time)
             
             if interest_over_time.empty:
                 logger.warning(f"No Google Trends data for {city}, {country}")
@@ -220,25 +418,35 @@ class TrendsCollector(BaseCollector):
                     'keywords': keywords_list
                 }
             
-            # Convertir en format standardisé
-            trends_data = []
-            for date_idx, row in interest_over_time.iterrows():
-                # Calculer la moyenne des volumes de recherche pour tous les mots-clés
-                row_values = row.drop('isPartial') if 'isPartial' in row else row
-                avg_volume = row_values.mean()
-                
-                # Vérifier si la valeur est NaN
-                if PANDAS_AVAILABLE:
-                    is_na = pd.isna(avg_volume)
-                else:
-                    is_na = avg_volume is None or (isinstance(avg_volume, float) and avg_volume != avg_volume)
-                
-                trends_data.append({
-                    'date': date_idx.date() if hasattr(date_idx, 'date') else date_idx,
-                    'search_volume_index': int(avg_volume) if not is_na else None,
+            # Convertir en format standardisé, par colonnes (pas de Series par ligne)
+            volumes = interest_over_time.drop(columns='isPartial', errors='ignore')
+            
+            # Moyenne des volumes de recherche pour tous les mots-clés, en une passe
+            means = volumes.mean(axis=1).to_numpy()
+            # Masque NaN calculé une fois sur tout le tableau, puis conversion en scalaires
+            # Python d'un bloc (pas de test ni de scalaire numpy par ligne)
+            if NUMPY_AVAILABLE:
+                missing = np.isnan(means).tolist()
+                means = means.tolist()
+            else:
+                means = means.tolist()
+                # NaN est la seule valeur différente d'elle-même
+                missing = [mean != mean for mean in means]
+            
+            index = interest_over_time.index
+            dates = index.date if hasattr(index, 'date') else list(index)
+            details_list = interest_over_time.to_dict('records')
+            
+            trends_data = [
+                {
+                    'date': trend_date,
+                    'search_volume_index': None if is_na else int(avg_volume),
                     'keywords': keywords_list,
-                    'details': row.to_dict() if hasattr(row, 'to_dict') else dict(row)
-                })
+                    'details': details
+                }
+                for trend_date, avg_volume, is_na, details
+                in zip(dates, means, missing, details_list)
+            ]
             
             return {
                 'source': 'google_trends',
@@ -274,20 +482,20 @@ class TrendsCollector(BaseCollector):
             )
         
         try:
-            loop = asyncio.get_event_loop()
-            
-            # Récupérer les propriétés pour cette ville
-            properties_query = self._supabase_client.table('properties')\
-                .select('id')\
-                .eq('city', city)\
-                .eq('country', country)
-            
-            properties_response = await loop.run_in_executor(
-                None,
-                lambda: properties_query.execute()
-            )
-            
-            property_ids = [p['id'] for p in (properties_response.data or [])]
+            # Récupérer les propriétés pour cette ville (toutes les pages), sauf si
+            # elles ont été lues il y a moins de PROPERTY_IDS_CACHE_TTL secondes
+            property_ids = self._property_ids_cache.get((city, country))
+            if property_ids is None:
+                def properties_page(offset: int, count: Optional[str] = None):
+                    return self._supabase_client.table('properties')\
+                        .select('id', count=count)\
+                        .eq('city', city)\
+                        .eq('country', country)\
+                        .order('id')\
+                        .range(offset, offset + self.SUPABASE_PAGE_SIZE - 1)
+                
+                property_ids = [p['id'] for p in await self._fetch_all_pages(properties_page)]
+                self._property_ids_cache.set((city, country), property_ids)
             
             if not property_ids:
                 logger.warning(f"No properties found for {city}, {country}")
@@ -296,57 +504,58 @@ class TrendsCollector(BaseCollector):
                     'data': []
                 }
             
-            # Parcourir les dates dans la plage
+            start_date = date_range['start_date']
+            end_date = date_range['end_date']
+            n_days = (end_date - start_date).days + 1
+            
+            # Récupérer en une requête (paginée) toutes les réservations qui chevauchent
+            # la plage, au lieu d'une requête par jour
+            bookings = await self._fetch_city_bookings(
+                city, country, start_date, end_date, property_ids
+            ) if n_days > 0 else []
+            
+            # Répartir les réservations par jour couvert (dans un thread pour les gros
+            # portefeuilles : numpy relâche le GIL, l'event loop reste disponible)
+            if len(bookings) >= self.LARGE_SWEEP_THRESHOLD:
+                daily_counts = await asyncio.get_running_loop().run_in_executor(
+                    None,
+                    _daily_booking_counts,
+                    bookings,
+                    start_date,
+                    n_days
+                )
+            else:
+                daily_counts = _daily_booking_counts(bookings, start_date, n_days)
+            
             trends_data = []
-            current_date = date_range['start_date']
+            total_properties = len(property_ids)
             
-            while current_date <= date_range['end_date']:
-                try:
-                    # Récupérer les réservations pour ce jour
-                    bookings_query = self._supabase_client.table('bookings')\
-                        .select('id')\
-                        .in_('property_id', property_ids)\
-                        .lte('start_date', current_date.isoformat())\
-                        .gte('end_date', current_date.isoformat())
-                    
-                    bookings_response = await loop.run_in_executor(
-                        None,
-                        lambda: bookings_query.execute()
-                    )
-                    
-                    booking_count = len(bookings_response.data or [])
-                    
-                    # Estimer le volume de recherche basé sur les réservations
-                    # (corrélation approximative : plus de réservations = plus de recherche)
-                    # Normaliser sur une échelle 0-100
-                    # On utilise une estimation basée sur le nombre de propriétés et réservations
-                    total_properties = len(property_ids)
-                    booking_rate = booking_count / max(total_properties, 1)
-                    
-                    # Estimation du volume de recherche (0-100)
-                    # Basé sur le taux de réservation et le nombre de propriétés
-                    search_volume_estimate = min(100, int(booking_rate * 50 + (total_properties / 10)))
-                    
-                    # Récupérer le nombre de listings actifs (propriétés non supprimées)
-                    active_listings_count = total_properties
-                    
-                    # Estimation du volume de réservations (basé sur les réservations du jour)
-                    booking_volume_estimate = booking_count
-                    
-                    trends_data.append({
-                        'date': current_date,
-                        'search_volume_index': search_volume_estimate,
-                        'booking_volume_estimate': booking_volume_estimate,
-                        'active_listings_count': active_listings_count,
-                        'new_listings_count': None,  # Nécessiterait historique
-                        'average_lead_time_days': None,  # Nécessiterait calcul depuis bookings
-                        'cancellation_rate': None  # Nécessiterait calcul depuis bookings
-                    })
+            for day_offset, booking_count in enumerate(daily_counts):
+                # Estimer le volume de recherche basé sur les réservations
+                # (corrélation approximative : plus de réservations = plus de recherche)
+                # Normaliser sur une échelle 0-100
+                # On utilise une estimation basée sur le nombre de propriétés et réservations
+                booking_rate = booking_count / max(total_properties, 1)
+                
+                # Estimation du volume de recherche (0-100)
+                # Basé sur le taux de réservation et le nombre de propriétés
+                search_volume_estimate = min(100, int(booking_rate * 50 + (total_properties / 10)))
                 
-                except Exception as e:
-                    logger.warning(f"Error aggregating data for {current_date}: {e}")
+                # Récupérer le nombre de listings actifs (propriétés non supprimées)
+                active_listings_count = total_properties
                 
-                current_date += timedelta(days=1)
+                # Estimation du volume de réservations (basé sur les réservations du jour)
+                booking_volume_estimate = booking_count
+                
+                trends_data.append({
+                    'date': start_date + timedelta(days=day_offset),
+                    'search_volume_index': search_volume_estimate,
+                    'booking_volume_estimate': booking_volume_estimate,
+                    'active_listings_count': active_listings_count,
+                    'new_listings_count': None,  # Nécessiterait historique
+                    'average_lead_time_days': None,  # Nécessiterait calcul depuis bookings
+                    'cancellation_rate': None  # Nécessiterait calcul depuis bookings
+                })
             
             return {
                 'source': 'internal_aggregation',
@@ -357,6 +566,149 @@ class TrendsCollector(BaseCollector):
             logger.error(f"Error in internal aggregation: {e}", exc_info=True)
             raise
     
+    async def _fetch_city_bookings(
+        self,
+        city: str,
+        country: str,
+        start_date: date,
+        end_date: date,
+        property_ids: List[Any]
+    ) -> List[Dict[str, Any]]:
+        """
+        Récupère les réservations de la ville qui chevauchent [start_date, end_date].
+        
+        Utilise la fonction Postgres CITY_BOOKINGS_RPC (jointure côté serveur, pas de
+        liste d'identifiants dans l'URL) si elle existe ; sinon filtre `bookings` par
+        `property_id IN (...)`. L'absence de la fonction est mémorisée.
+        
+        Returns:
+            Lignes {'start_date', 'end_date'}
+        """
+        # Bornes formatées une seule fois, réutilisées par toutes les pages
+        start_iso = start_date.isoformat()
+        end_iso = end_date.isoformat()
+        
+        if self._city_bookings_rpc_available is not False:
+            params = {
+                'p_city': city,
+                'p_country': country,
+                'p_start': start_iso,
+                'p_end': end_iso
+            }
+            
+            def rpc_page(offset: int, count: Optional[str] = None):
+                # Tri sur toutes les colonnes renvoyées : la suite des valeurs est
+                # déterministe d'une page à l'autre (les ex aequo sont identiques)
+                return self._supabase_client.rpc(self.CITY_BOOKINGS_RPC, params, count=count)\
+                    .order('start_date')\
+                    .order('end_date')\
+                    .range(offset, offset + self.SUPABASE_PAGE_SIZE - 1)
+            
+            try:
+                bookings = await self._fetch_all_pages(rpc_page)
+                self._city_bookings_rpc_available = True
+                return bookings
+            except Exception as e:
+                if self._city_bookings_rpc_available:
+                    raise
+                self._city_bookings_rpc_available = False
+                logger.info(
+                    f"RPC {self.CITY_BOOKINGS_RPC} unavailable ({e}), "
+                    f"filtering bookings by property ids"
+                )
+        
+        def bookings_page(offset: int, count: Optional[str] = None):
+            return self._supabase_client.table('bookings')\
+                .select('start_date,end_date', count=count)\
+                .in_('property_id', property_ids)\
+                .lte('start_date', end_iso)\
+                .gte('end_date', start_iso)\
+                .order('id')\
+                .range(offset, offset + self.SUPABASE_PAGE_SIZE - 1)
+        
+        return await self._fetch_all_pages(bookings_page)
+    
+    async def _execute_with_retry(self, query) -> Any:
+        """
+        Exécute une requête Supabase dans le thread pool, avec retries sur erreurs réseau.
+        
+        Seules les erreurs transitoires (timeout, connexion) sont réessayées, avec
+        backoff exponentiel (settings.retry_backoff_factor ** tentative) ; les autres
+        erreurs (requête invalide, fonction absente...) remontent immédiatement.
+        
+        Args:
+            query: Requête Supabase construite (non exécutée)
+            
+        Returns:
+            Réponse de `query.execute()`
+        """
+        loop = asyncio.get_running_loop()
+        max_retries = max(self.settings.max_retries, 1)
+        
+        for attempt in range(max_retries):
+            try:
+                return await loop.run_in_executor(_SUPABASE_EXECUTOR, query.execute)
+            except TRANSIENT_SUPABASE_ERRORS as e:
+                if attempt == max_retries - 1:
+                    raise
+                wait_time = self.settings.retry_backoff_factor ** attempt
+                logger.warning(
+                    f"Supabase network error (attempt {attempt + 1}/{max_retries}), "
+                    f"retrying in {wait_time}s: {e}"
+                )
+                await asyncio.sleep(wait_time)
+    
+    async def _fetch_all_pages(self, build_page) -> List[Dict[str, Any]]:
+        """
+        Récupère toutes les lignes d'une requête Supabase paginée.
+        
+        La première page demande le total (`count='exact'`) ; les pages restantes sont
+        alors récupérées en parallèle (au plus SUPABASE_MAX_CONCURRENCY à la fois).
+        Sans total exploitable, les pages sont lues l'une après l'autre.
+        
+        Les requêtes étant indépendantes, `build_page` doit imposer un tri déterministe
+        (`.order(...)`) : sans lui, PostgREST ne garantit pas le même ordre d'une page
+        à l'autre (lignes dupliquées ou sautées entre pages).
+        
+        Args:
+            build_page: Fonction (offset, count=None) -> requête Supabase triée pour une page
+            
+        Returns:
+            Lignes de toutes les pages, dans l'ordre
+        """
+        page_size = self.SUPABASE_PAGE_SIZE
+        
+        # Les requêtes sont construites sur l'event loop (sans I/O) ; seul `execute`
+        # (méthode liée, pas de closure) part dans le thread pool
+        first_page = await self._execute_with_retry(build_page(0, count='exact'))
+        rows = list(first_page.data or [])
+        if len(rows) < page_size:
+            return rows
+        
+        total = getattr(first_page, 'count', None)
+        if total is None:
+            offset = page_size
+            while True:
+                page = await self._execute_with_retry(build_page(offset))
+                page_rows = page.data or []
+                rows.extend(page_rows)
+                if len(page_rows) < page_size:
+                    return rows
+                offset += page_size
+        
+        semaphore = asyncio.Semaphore(self.SUPABASE_MAX_CONCURRENCY)
+        
+        async def fetch_page(offset: int):
+            async with semaphore:
+                return await self._execute_with_retry(build_page(offset))
+        
+        pages = await asyncio.gather(
+            *(fetch_page(offset) for offset in range(page_size, total, page_size))
+        )
+        for page in pages:
+            rows.extend(page.data or [])
+        return rows
+    
     def _normalize(
         self,
         raw_response: Dict[str, Any],
@@ -385,6 +737,12 @@ class TrendsCollector(BaseCollector):
         
         normalized = []
         
+        # Valeurs communes à tout le lot : un seul collected_at (en UTC, comme le
+        # champ 'timezone' des records) et des lectures de raw_response hors boucle
+        collected_at = datetime.now(timezone.utc).isoformat()
+        keywords = raw_response.get('keywords', [])
+        data_points = len(data_items)
+        
         for item in data_items:
             try:
                 # Date
@@ -410,15 +768,17 @@ class TrendsCollector(BaseCollector):
                     'new_listings_count': item.get('new_listings_count'),
                     'average_lead_time_days': item.get('average_lead_time_days'),
                     'cancellation_rate': item.get('cancellation_rate'),
-                    'keywords': raw_response.get('keywords', []),
+                    'keywords': keywords,
                     'timezone': 'UTC',  # Sera mis à jour par timezone_handler si nécessaire
+                    # Dict propre à chaque record : le modifier n'affecte pas les autres
                     'metadata': {
-                        'data_points': len(data_items),
+                        'data_points': data_points,
                         'calculation_method': source
                     },
-                    'raw_data': item,
-                    'collected_at': datetime.now().isoformat()
+                    'collected_at': collected_at
                 }
+                if self.include_raw_data:
+                    record['raw_data'] = item
                 
                 normalized.append(record)
             
@@ -428,20 +788,3 @@ class TrendsCollector(BaseCollector):
         
         logger.info(f"Normalized {len(normalized)} trends data points from {source}")
         return normalized
-
-
-# Import conditionnel de Supabase
-try:
-    from supabase import create_client, Client
-    SUPABASE_AVAILABLE = True
-except ImportError:
-    SUPABASE_AVAILABLE = False
-    logger.warning("Supabase client not available, internal aggregation will not work")
-
-# Import conditionnel de pandas pour Google Trends
-try:
-    import pandas as pd
-    PANDAS_AVAILABLE = True
-except ImportError:
-    PANDAS_AVAILABLE = False
-    logger.warning("pandas not available, some features may not work")
@@ -4,12 +4,15 @@ Collecteur de données météo (OpenWeatherMap, WeatherAPI avec fallback).
 
 import asyncio
 import logging
-from typing import Dict, List, Optional, Any
+from collections import Counter
+from typing import Dict, List, Optional, Any, Callable, Tuple, Union
 from datetime import date, datetime, timedelta
 
 from .base_collector import BaseCollector
+from .circuit_breaker import CircuitBreaker
 from ..config.api_keys import get_api_key, API_SERVICES
 from ..config.cities_config import get_city_config
+from ..utils.cache import TTLCache
 
 logger = logging.getLogger(__name__)
 
@@ -25,6 +28,31 @@ class WeatherCollector(BaseCollector):
     # URLs des APIs
     OPENWEATHER_BASE_URL = "https://api.openweathermap.org/data/2.5"
     WEATHERAPI_BASE_URL = "http://api.weatherapi.com/v1"
+    OPENWEATHER_FORECAST_URL = f"{OPENWEATHER_BASE_URL}/forecast"
+    WEATHERAPI_FORECAST_URL = f"{WEATHERAPI_BASE_URL}/forecast.json"
+    
+    # Durée de vie du cache des prévisions par source (secondes) : les fournisseurs
+    # ne republient leurs prévisions que toutes les 1 à 6 heures
+    FORECAST_CACHE_TTL = {'openweather': 3600, 'weatherapi': 3600}
+    
+    # Durée de conservation des validateurs HTTP (ETag / Last-Modified) et du corps
+    # associé : au-delà du TTL du cache, la réponse est revalidée par GET conditionnel
+    VALIDATORS_TTL = 24 * 3600
+    
+    # Timeout total d'un appel météo (secondes) : la session et son pool keep-alive
+    # sont partagés (BaseCollector), une source lente bascule vite sur le fallback
+    REQUEST_TIMEOUT = 10
+    
+    # Champs obligatoires d'un record normalisé
+    _REQUIRED_FIELDS = frozenset({'source', 'country', 'city', 'forecast_date'})
+    
+    # Conditions considérées comme ensoleillées (OpenWeather : valeur exacte,
+    # WeatherAPI : sous-chaîne du libellé)
+    _SUNNY_EXACT = frozenset({'clear', 'sunny'})
+    _SUNNY_TOKENS = ('sun', 'clear')
+    
+    # Champs horaires WeatherAPI conservés (les seuls lus par la normalisation)
+    _WEATHERAPI_HOUR_FIELDS = ('humidity', 'wind_kph', 'cloud')
     
     def __init__(
         self,
@@ -61,6 +89,43 @@ class WeatherCollector(BaseCollector):
             elif self.fallback_source == "weatherapi":
                 self.api_keys["weatherapi"] = self.api_keys.get("weatherapi") or get_api_key(API_SERVICES.WEATHERAPI)
         
+        # Tables de dispatch par source : ajouter un fournisseur = une entrée ici
+        self._fetchers = {
+            'openweather': self._fetch_openweather,
+            'weatherapi': self._fetch_weatherapi
+        }
+        self._normalizers = {
+            'openweather': self._normalize_openweather,
+            'weatherapi': self._normalize_weatherapi
+        }
+        
+        # Paramètres statiques des requêtes, construits une fois (copiés et complétés à chaque appel)
+        self._openweather_params = {
+            'appid': self.api_keys.get("openweather"),
+            'units': 'metric',  # Celsius
+            'lang': 'en'
+        }
+        self._weatherapi_params = {
+            'key': self.api_keys.get("weatherapi"),
+            'days': self.forecast_days,
+            'aqi': 'no',
+            'alerts': 'no'
+        }
+        
+        # Cache des réponses brutes {(source, city, country, lat, lon, days): réponse}
+        self._forecast_cache = TTLCache(maxsize=512, ttl=max(self.FORECAST_CACHE_TTL.values()))
+        # Requêtes en vol par clé de cache : les appels concurrents identiques
+        # attendent la même tâche au lieu de relancer l'appel API
+        self._pending_fetches: Dict[tuple, asyncio.Future] = {}
+        # Validateurs HTTP par requête {(url, params): {'etag', 'last_modified', 'body'}}
+        self._validators = TTLCache(maxsize=512, ttl=self.VALIDATORS_TTL)
+        # Un disjoncteur par source : pendant une panne, les appels à la source
+        # défaillante échouent immédiatement et collect() bascule sur le fallback
+        self._breakers = {
+            'openweather': CircuitBreaker(),
+            'weatherapi': CircuitBreaker()
+        }
+        
         # Utiliser la clé de la source primaire pour BaseCollector
         primary_api_key = self.api_keys.get(self.primary_source)
         
@@ -130,7 +195,8 @@ class WeatherCollector(BaseCollector):
                 country=country,
                 latitude=lat,
                 longitude=lon,
-                date_range=date_range
+                date_range=date_range,
+                source=self.primary_source
             )
         except Exception as e:
             logger.warning(f"Primary source {self.primary_source} failed: {e}")
@@ -138,26 +204,20 @@ class WeatherCollector(BaseCollector):
             if self.fallback_source and self.fallback_source != self.primary_source:
                 logger.info(f"Trying fallback source: {self.fallback_source}")
                 try:
-                    # Changer temporairement de source
-                    original_source = self.primary_source
-                    self.primary_source = self.fallback_source
-                    self.api_key = self.api_keys.get(self.fallback_source)
-                    
+                    # Source passée explicitement : aucun état d'instance n'est modifié,
+                    # les collectes concurrentes sur la même instance restent cohérentes
                     raw_data = await self._fetch_data(
                         city=city,
                         country=country,
                         latitude=lat,
                         longitude=lon,
-                        date_range=date_range
+                        date_range=date_range,
+                        source=self.fallback_source
                     )
                     
                     source_used = self.fallback_source
                     logger.info(f"Fallback source {self.fallback_source} succeeded")
                     
-                    # Restaurer la source primaire
-                    self.primary_source = original_source
-                    self.api_key = self.api_keys.get(original_source)
-                    
                 except Exception as fallback_error:
                     logger.error(
                         f"Both sources failed. Primary: {e}, Fallback: {fallback_error}"
@@ -181,23 +241,49 @@ class WeatherCollector(BaseCollector):
         
         # Valider et stocker
         if store_in_db:
-            validated_data = [
-                item for item in normalized_data
-                if self._validate(item)
-            ]
-            
-            if validated_data:
-                await self._store_raw_data(validated_data)
+            # Validation paresseuse : les records sont filtrés au fil des lots d'upsert
+            await self._store_raw_data(filter(self._validate, normalized_data))
         
         return normalized_data
     
+    async def collect_many(
+        self,
+        targets: List[Tuple[str, str]],
+        concurrency: int = 10,
+        **kwargs
+    ) -> List[Union[List[Dict[str, Any]], BaseException]]:
+        """
+        Collecte la météo de plusieurs villes en parallèle.
+        
+        Args:
+            targets: Liste de couples (city, country)
+            concurrency: Nombre maximum de collectes simultanées
+            **kwargs: Arguments transmis à collect() (date_range, store_in_db)
+        
+        Returns:
+            Un résultat par ville, dans l'ordre de `targets` : la liste de données
+            normalisées, ou l'exception levée pour cette ville
+        """
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+        
+        async def collect_one(city: str, country: str) -> List[Dict[str, Any]]:
+            async with semaphore:
+                return await self.collect(city, country, **kwargs)
+        
+        return await asyncio.gather(
+            *(collect_one(city, country) for city, country in targets),
+            return_exceptions=True
+        )
+    
     async def _fetch_data(
         self,
         city: str,
         country: str,
         latitude: Optional[float] = None,
         longitude: Optional[float] = None,
-        date_range: Optional[Dict[str, date]] = None
+        date_range: Optional[Dict[str, date]] = None,
+        *,
+        source: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Récupère les données brutes depuis l'API météo.
@@ -208,60 +294,189 @@ class WeatherCollector(BaseCollector):
             latitude: Latitude (optionnel)
             longitude: Longitude (optionnel)
             date_range: Plage de dates
+            source: Source à interroger (défaut: source primaire)
         
         Returns:
             Données brutes de l'API
         """
-        if self.primary_source == "openweather":
-            return await self._fetch_openweather(
-                city=city,
-                country=country,
-                latitude=latitude,
-                longitude=longitude
+        source = source or self.primary_source
+        cache_key = (source, city, country, latitude, longitude, self.forecast_days)
+        
+        cached = self._forecast_cache.get(cache_key)
+        if cached is not None:
+            logger.debug(f"Weather cache hit for {city}, {country} ({source})")
+            return cached
+        
+        # Single-flight : une seule requête amont par clé, partagée par les appelants
+        task = self._pending_fetches.get(cache_key)
+        if task is None:
+            task = asyncio.ensure_future(
+                self._fetch_and_cache(cache_key, city, country, latitude, longitude, date_range)
             )
-        elif self.primary_source == "weatherapi":
-            return await self._fetch_weatherapi(
+            self._pending_fetches[cache_key] = task
+            task.add_done_callback(lambda _t: self._pending_fetches.pop(cache_key, None))
+        
+        # shield : l'annulation d'un appelant n'annule pas la requête partagée
+        return await asyncio.shield(task)
+    
+    async def _fetch_and_cache(
+        self,
+        cache_key: tuple,
+        city: str,
+        country: str,
+        latitude: Optional[float],
+        longitude: Optional[float],
+        date_range: Optional[Dict[str, date]]
+    ) -> Dict[str, Any]:
+        """Interroge la source de `cache_key` et met la réponse en cache."""
+        source = cache_key[0]
+        breaker = self._breakers.get(source)
+        if breaker:
+            breaker.before_request(source)
+        
+        try:
+            result = await self._fetch_from_source(
+                source=source,
                 city=city,
                 country=country,
                 latitude=latitude,
                 longitude=longitude,
                 date_range=date_range
             )
-        else:
-            raise ValueError(f"Unknown source: {self.primary_source}")
+        except BaseException:
+            # BaseException : un appel de test annulé (CancelledError) doit aussi
+            # rendre un résultat au disjoncteur, sinon il resterait en half_open
+            if breaker:
+                breaker.record_failure()
+            raise
+        
+        if breaker:
+            breaker.record_success()
+        self._forecast_cache.set(
+            cache_key,
+            result,
+            ttl=self.FORECAST_CACHE_TTL.get(cache_key[0])
+        )
+        return result
+    
+    async def _fetch_from_source(
+        self,
+        source: str,
+        city: str,
+        country: str,
+        latitude: Optional[float] = None,
+        longitude: Optional[float] = None,
+        date_range: Optional[Dict[str, date]] = None
+    ) -> Dict[str, Any]:
+        """Appelle l'API de `source` sans passer par le cache."""
+        fetcher = self._fetchers.get(source)
+        if fetcher is None:
+            raise ValueError(f"Unknown source: {source}")
+        
+        # Erreurs transitoires (429, 5xx, réseau, timeout) : nouvelles tentatives sur la
+        # même source (backoff plafonné + jitter de BaseCollector) avant de la déclarer
+        # en échec ; les erreurs de configuration ou de parsing passent au fallback aussitôt
+        return await self._retry_with_backoff(
+            fetcher,
+            max(1, self.settings.max_retries),
+            retry_other_errors=False,
+            city=city,
+            country=country,
+            latitude=latitude,
+            longitude=longitude,
+            date_range=date_range
+        )
+    
+    def _auth_headers(self, source: str) -> Dict[str, str]:
+        """
+        Headers d'authentification pour `source`.
+        
+        _make_request ajoute sinon self.api_key (clé de la source primaire) : on fixe
+        la clé de la source réellement appelée pour ne jamais l'envoyer à l'autre fournisseur.
+        """
+        api_key = self.api_keys.get(source)
+        return {'Authorization': f'Bearer {api_key}'} if api_key else {}
+    
+    async def _conditional_get(
+        self,
+        source: str,
+        url: str,
+        params: Dict[str, Any],
+        postprocess: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None
+    ) -> Dict[str, Any]:
+        """
+        GET conditionnel (If-None-Match / If-Modified-Since).
+        
+        Si une réponse précédente a fourni un ETag ou un Last-Modified, ils sont renvoyés
+        au serveur ; sur 304 Not Modified, le corps conservé est réutilisé sans
+        transfert ni parsing.
+        
+        Args:
+            source: Source appelée (pour l'authentification)
+            url: URL de l'endpoint
+            params: Query parameters
+            postprocess: Transformation appliquée au corps reçu avant conservation
+        
+        Returns:
+            Réponse JSON (éventuellement transformée)
+        """
+        validator_key = (url, tuple(sorted(params.items())))
+        entry = self._validators.get(validator_key)
+        
+        headers = self._auth_headers(source)
+        if entry:
+            if entry['etag']:
+                headers['If-None-Match'] = entry['etag']
+            if entry['last_modified']:
+                headers['If-Modified-Since'] = entry['last_modified']
+        
+        info: Dict[str, Any] = {}
+        response = await self._make_request(
+            'GET',
+            url,
+            headers=headers,
+            params=params,
+            timeout=self.REQUEST_TIMEOUT,
+            response_info=info
+        )
+        
+        if info.get('status') == 304 and entry:
+            logger.debug(f"{source} forecast not modified, reusing previous response")
+            return entry['body']
+        
+        if postprocess:
+            response = postprocess(response)
+        if info.get('etag') or info.get('last_modified'):
+            self._validators.set(validator_key, {
+                'etag': info.get('etag'),
+                'last_modified': info.get('last_modified'),
+                'body': response
+            })
+        return response
     
     async def _fetch_openweather(
         self,
         city: str,
         country: str,
         latitude: Optional[float] = None,
-        longitude: Optional[float] = None
+        longitude: Optional[float] = None,
+        date_range: Optional[Dict[str, date]] = None
     ) -> Dict[str, Any]:
-        """Récupère les données depuis OpenWeatherMap API."""
+        """Récupère les données depuis OpenWeatherMap API (date_range ignoré : 5 jours fixes)."""
         if not self.api_keys.get("openweather"):
             raise RuntimeError("OpenWeatherMap API key not configured")
         
-        # Construire l'URL selon si on a les coordonnées
+        # Localiser par coordonnées si disponibles, sinon par nom de ville
         if latitude and longitude:
-            url = f"{self.OPENWEATHER_BASE_URL}/forecast"
-            params = {
-                'lat': latitude,
-                'lon': longitude,
-                'appid': self.api_keys["openweather"],
-                'units': 'metric',  # Celsius
-                'lang': 'en'
-            }
+            params = {**self._openweather_params, 'lat': latitude, 'lon': longitude}
         else:
-            # Utiliser le nom de la ville
-            url = f"{self.OPENWEATHER_BASE_URL}/forecast"
-            params = {
-                'q': f"{city},{country}",
-                'appid': self.api_keys["openweather"],
-                'units': 'metric',
-                'lang': 'en'
-            }
+            params = {**self._openweather_params, 'q': f"{city},{country}"}
         
-        response = await self._make_request('GET', url, params=params)
+        response = await self._conditional_get(
+            "openweather",
+            self.OPENWEATHER_FORECAST_URL,
+            params
+        )
         
         return {
             'source': 'openweather',
@@ -289,16 +504,14 @@ class WeatherCollector(BaseCollector):
             query = f"{city},{country}"
         
         # WeatherAPI supporte forecast jusqu'à 14 jours
-        url = f"{self.WEATHERAPI_BASE_URL}/forecast.json"
-        params = {
-            'key': self.api_keys["weatherapi"],
-            'q': query,
-            'days': self.forecast_days,
-            'aqi': 'no',
-            'alerts': 'no'
-        }
+        params = {**self._weatherapi_params, 'q': query}
         
-        response = await self._make_request('GET', url, params=params)
+        response = await self._conditional_get(
+            "weatherapi",
+            self.WEATHERAPI_FORECAST_URL,
+            params,
+            postprocess=self._slim_weatherapi_response
+        )
         
         return {
             'source': 'weatherapi',
@@ -307,6 +520,34 @@ class WeatherCollector(BaseCollector):
             'country': country
         }
     
+    @classmethod
+    def _slim_weatherapi_response(cls, response: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Réduit une réponse WeatherAPI aux champs utilisés par la normalisation.
+        
+        Chaque jour contient 24 relevés horaires d'une trentaine de champs ; seuls
+        humidité, vent et couverture nuageuse sont lus. Élaguer dès la réception
+        libère l'arbre JSON complet au lieu de le garder en cache (TTL) et en mémoire
+        pendant les collectes concurrentes.
+        """
+        forecast = response.get('forecast')
+        if not isinstance(forecast, dict):
+            return response
+        
+        hour_fields = cls._WEATHERAPI_HOUR_FIELDS
+        slim_days = [
+            {
+                'date': day.get('date'),
+                'day': day.get('day', {}),
+                'hour': [
+                    {field: hour[field] for field in hour_fields if field in hour}
+                    for hour in day.get('hour', [])
+                ]
+            }
+            for day in forecast.get('forecastday', [])
+        ]
+        return {**response, 'forecast': {'forecastday': slim_days}}
+    
     def _normalize(
         self,
         raw_response: Dict[str, Any],
@@ -334,16 +575,10 @@ class WeatherCollector(BaseCollector):
         """
         logger.info(f"Normalizing weather data from {source_used}")
         
-        if source_used == "openweather":
-            return self._normalize_openweather(
-                raw_response, city, country, latitude, longitude, timezone
-            )
-        elif source_used == "weatherapi":
-            return self._normalize_weatherapi(
-                raw_response, city, country, latitude, longitude, timezone
-            )
-        else:
+        normalizer = self._normalizers.get(source_used)
+        if normalizer is None:
             raise ValueError(f"Unknown source for normalization: {source_used}")
+        return normalizer(raw_response, city, country, latitude, longitude, timezone)
     
     def _normalize_openweather(
         self,
@@ -368,8 +603,8 @@ class WeatherCollector(BaseCollector):
             
             # Parser la date
             try:
-                forecast_dt = datetime.strptime(dt_txt, '%Y-%m-%d %H:%M:%S')
-                forecast_date = forecast_dt.date()
+                # 'YYYY-MM-DD HH:MM:SS' : fromisoformat (parseur C) accepte l'espace
+                forecast_date = datetime.fromisoformat(dt_txt).date()
             except ValueError:
                 logger.warning(f"Could not parse date: {dt_txt}")
                 continue
@@ -381,33 +616,48 @@ class WeatherCollector(BaseCollector):
         
         # Agréger par date
         normalized_records = []
+        # Un seul horodatage de collecte pour tous les records
+        collected_at = datetime.now().isoformat()
+        # Liaison locale : évite la résolution du builtin à chaque arrondi de la boucle
+        _round = round
         
         for forecast_date, items in forecasts_by_date.items():
-            # Calculer les moyennes
-            temps = [item['main']['temp'] for item in items]
-            temps_min = [item['main']['temp_min'] for item in items]
-            temps_max = [item['main']['temp_max'] for item in items]
-            humidities = [item['main']['humidity'] for item in items]
-            precipitations = [
-                item.get('rain', {}).get('3h', 0) for item in items
-            ]
-            wind_speeds = [item.get('wind', {}).get('speed', 0) for item in items]
-            cloud_covers = [item.get('clouds', {}).get('all', 0) for item in items]
+            # Agrégation en une seule passe (sommes, min/max et comptage des conditions)
+            n = len(items)
+            t_sum = h_sum = p_sum = w_sum = c_sum = 0.0
+            t_min = t_max = c_max = None
+            condition_counts = Counter()
+            
+            for item in items:
+                main = item['main']
+                t_sum += main['temp']
+                h_sum += main['humidity']
+                temp_min = main['temp_min']
+                temp_max = main['temp_max']
+                if t_min is None or temp_min < t_min:
+                    t_min = temp_min
+                if t_max is None or temp_max > t_max:
+                    t_max = temp_max
+                
+                p_sum += item.get('rain', {}).get('3h', 0)
+                w_sum += item.get('wind', {}).get('speed', 0)
+                cloud = item.get('clouds', {}).get('all', 0)
+                c_sum += cloud
+                if c_max is None or cloud > c_max:
+                    c_max = cloud
+                
+                condition_counts[item.get('weather', [{}])[0].get('main', '').lower()] += 1
             
             # Conditions météo (prendre la plus fréquente)
-            weather_conditions = [
-                item.get('weather', [{}])[0].get('main', '').lower()
-                for item in items
-            ]
-            most_common_condition = max(
-                set(weather_conditions),
-                key=weather_conditions.count
-            ) if weather_conditions else 'unknown'
+            most_common_condition = (
+                condition_counts.most_common(1)[0][0]
+                if condition_counts else 'unknown'
+            )
             
             # Calculer is_sunny
             is_sunny = (
-                most_common_condition in ['clear', 'sunny'] and
-                max(cloud_covers) < 30  # Moins de 30% de couverture nuageuse
+                most_common_condition in self._SUNNY_EXACT and
+                c_max < 30  # Moins de 30% de couverture nuageuse
             )
             
             # UV index (non disponible dans forecast gratuit, mettre None)
@@ -420,27 +670,25 @@ class WeatherCollector(BaseCollector):
                 'latitude': float(latitude) if latitude else None,
                 'longitude': float(longitude) if longitude else None,
                 'forecast_date': forecast_date.isoformat(),
-                'collected_at': datetime.now().isoformat(),
+                'collected_at': collected_at,
                 'raw_data': {
                     'api_response': items[0] if items else {},  # Échantillon
-                    'items_count': len(items)
+                    'items_count': n
                 },
-                'temperature_avg': round(sum(temps) / len(temps), 2),
-                'temperature_min': round(min(temps_min), 2),
-                'temperature_max': round(max(temps_max), 2),
-                'precipitation_mm': round(sum(precipitations), 2),
-                'humidity_percent': round(sum(humidities) / len(humidities), 2),
-                'wind_speed_kmh': round(
-                    sum(wind_speeds) / len(wind_speeds) * 3.6, 2
-                ),  # Convertir m/s en km/h
+                'temperature_avg': _round(t_sum / n, 2),
+                'temperature_min': _round(t_min, 2),
+                'temperature_max': _round(t_max, 2),
+                'precipitation_mm': _round(p_sum, 2),
+                'humidity_percent': _round(h_sum / n, 2),
+                'wind_speed_kmh': _round(w_sum / n * 3.6, 2),  # Convertir m/s en km/h
                 'weather_condition': most_common_condition,
                 'is_sunny': is_sunny,
-                'cloud_cover_percent': round(sum(cloud_covers) / len(cloud_covers), 2),
+                'cloud_cover_percent': _round(c_sum / n, 2),
                 'uv_index': uv_index,
                 'timezone': timezone,
                 'metadata': {
                     'source': 'openweather',
-                    'forecast_count': len(items)
+                    'forecast_count': n
                 }
             }
             
@@ -463,14 +711,19 @@ class WeatherCollector(BaseCollector):
         forecast_days = data.get('forecast', {}).get('forecastday', [])
         
         normalized_records = []
+        # Un seul horodatage de collecte pour tous les records
+        collected_at = datetime.now().isoformat()
+        # Liaison locale : évite la résolution du builtin à chaque arrondi de la boucle
+        _round = round
+        location_id = f"{location.get('lat')},{location.get('lon')}"
         
-        for forecast_day in forecast_days:
+        for day_index, forecast_day in enumerate(forecast_days):
             date_str = forecast_day.get('date')
             if not date_str:
                 continue
             
             try:
-                forecast_date = datetime.strptime(date_str, '%Y-%m-%d').date()
+                forecast_date = date.fromisoformat(date_str)
             except ValueError:
                 logger.warning(f"Could not parse date: {date_str}")
                 continue
@@ -486,29 +739,34 @@ class WeatherCollector(BaseCollector):
             # Précipitations
             precipitation_mm = day_data.get('totalprecip_mm', 0)
             
-            # Humidité (moyenne des heures)
-            humidities = [h.get('humidity', 0) for h in hour_data]
-            humidity_avg = sum(humidities) / len(humidities) if humidities else day_data.get('avghumidity', 0)
+            # Humidité, vent et couverture nuageuse : moyennes horaires en une passe
+            hum_sum = wind_sum = cloud_sum = 0.0
+            for h in hour_data:
+                hum_sum += h.get('humidity', 0)
+                wind_sum += h.get('wind_kph', 0)
+                cloud_sum += h.get('cloud', 0)
             
-            # Vent (moyenne des heures)
-            wind_speeds = [h.get('wind_kph', 0) for h in hour_data]
-            wind_speed_kmh = sum(wind_speeds) / len(wind_speeds) if wind_speeds else day_data.get('maxwind_kph', 0)
+            n_hours = len(hour_data)
+            if n_hours:
+                humidity_avg = hum_sum / n_hours
+                wind_speed_kmh = wind_sum / n_hours
+                cloud_cover_percent = cloud_sum / n_hours
+            else:
+                humidity_avg = day_data.get('avghumidity', 0)
+                wind_speed_kmh = day_data.get('maxwind_kph', 0)
+                cloud_cover_percent = day_data.get('avgvis_km', 0)
             
             # Conditions météo
             condition = day_data.get('condition', {})
             weather_condition = condition.get('text', '').lower()
             
-            # Couverture nuageuse (moyenne des heures)
-            cloud_covers = [h.get('cloud', 0) for h in hour_data]
-            cloud_cover_percent = sum(cloud_covers) / len(cloud_covers) if cloud_covers else day_data.get('avgvis_km', 0)
-            
             # UV index
             uv_index = day_data.get('uv', None)
             
             # Calculer is_sunny
-            is_sunny = (
-                'sun' in weather_condition or 'clear' in weather_condition
-            ) and cloud_cover_percent < 30
+            is_sunny = cloud_cover_percent < 30 and any(
+                token in weather_condition for token in self._SUNNY_TOKENS
+            )
             
             # Latitude/Longitude depuis location si non fourni
             if not latitude:
@@ -523,21 +781,26 @@ class WeatherCollector(BaseCollector):
                 'latitude': float(latitude) if latitude else None,
                 'longitude': float(longitude) if longitude else None,
                 'forecast_date': forecast_date.isoformat(),
-                'collected_at': datetime.now().isoformat(),
+                'collected_at': collected_at,
+                # Référence compacte : le résumé du jour sans les 24 relevés horaires ;
+                # le bloc `location`, identique pour tous les jours, n'est gardé
+                # qu'une fois (premier jour de la collecte)
                 'raw_data': {
-                    'api_response': forecast_day,
-                    'location': location
+                    'day_index': day_index,
+                    'location_id': location_id,
+                    'day': day_data,
+                    **({'location': location} if day_index == 0 else {})
                 },
-                'temperature_avg': round(temp_avg, 2) if temp_avg else None,
-                'temperature_min': round(temp_min, 2) if temp_min else None,
-                'temperature_max': round(temp_max, 2) if temp_max else None,
-                'precipitation_mm': round(precipitation_mm, 2) if precipitation_mm else 0,
-                'humidity_percent': round(humidity_avg, 2) if humidity_avg else None,
-                'wind_speed_kmh': round(wind_speed_kmh, 2) if wind_speed_kmh else None,
+                'temperature_avg': _round(temp_avg, 2) if temp_avg else None,
+                'temperature_min': _round(temp_min, 2) if temp_min else None,
+                'temperature_max': _round(temp_max, 2) if temp_max else None,
+                'precipitation_mm': _round(precipitation_mm, 2) if precipitation_mm else 0,
+                'humidity_percent': _round(humidity_avg, 2) if humidity_avg else None,
+                'wind_speed_kmh': _round(wind_speed_kmh, 2) if wind_speed_kmh else None,
                 'weather_condition': weather_condition,
                 'is_sunny': is_sunny,
-                'cloud_cover_percent': round(cloud_cover_percent, 2) if cloud_cover_percent else None,
-                'uv_index': round(uv_index, 1) if uv_index else None,
+                'cloud_cover_percent': _round(cloud_cover_percent, 2) if cloud_cover_percent else None,
+                'uv_index': _round(uv_index, 1) if uv_index else None,
                 'timezone': timezone or location.get('tz_id'),
                 'metadata': {
                     'source': 'weatherapi',
@@ -551,12 +814,10 @@ class WeatherCollector(BaseCollector):
     
     def _validate(self, data: Dict[str, Any]) -> bool:
         """Valide les données normalisées."""
-        required_fields = ['source', 'country', 'city', 'forecast_date']
-        
-        for field in required_fields:
-            if field not in data:
-                logger.warning(f"Missing required field: {field}")
-                return False
+        missing = self._REQUIRED_FIELDS.difference(data)
+        if missing:
+            logger.warning(f"Missing required field(s): {', '.join(sorted(missing))}")
+            return False
         
         # Valider la date
         try:
@@ -3,7 +3,7 @@ Gestion des clés API pour les différentes sources de données.
 """
 
 import os
-from typing import Optional
+from typing import Dict, Optional
 from dotenv import load_dotenv
 from pathlib import Path
 
@@ -12,10 +12,28 @@ project_root = Path(__file__).parent.parent.parent
 load_dotenv(dotenv_path=project_root / ".env")
 
 
+# Clés trouvées par service. Les absences ne sont pas mémorisées : une clé ajoutée
+# ensuite à l'environnement (ou au .env rechargé) est vue au prochain appel
+_API_KEY_CACHE: Dict[str, str] = {}
+
+
+def _read_api_key(service_name: str) -> Optional[str]:
+    """Lit la clé API d'un service dans l'environnement (None si absente)."""
+    # Gérer les exceptions pour les noms de variables différents
+    if service_name == "APIFY":
+        # Apify utilise APIFY_API_TOKEN au lieu de APIFY_API_KEY
+        return os.environ.get("APIFY_API_TOKEN") or os.environ.get("APIFY_API_KEY")
+    
+    return os.environ.get(f"{service_name}_API_KEY")
+
+
 def get_api_key(service_name: str, default: Optional[str] = None) -> Optional[str]:
     """
     Récupère la clé API pour un service donné.
     
+    Les clés trouvées sont mémorisées (set_api_key invalide l'entrée du service) ;
+    une clé absente est relue dans l'environnement à chaque appel.
+    
     Args:
         service_name: Nom du service (ex: 'AIRDNA', 'OPENWEATHER', 'NEWSAPI')
         default: Valeur par défaut si la clé n'est pas trouvée
@@ -23,13 +41,13 @@ def get_api_key(service_name: str, default: Optional[str] = None) -> Optional[st
     Returns:
         La clé API ou None si non trouvée
     """
-    # Gérer les exceptions pour les noms de variables différents
-    if service_name == "APIFY":
-        # Apify utilise APIFY_API_TOKEN au lieu de APIFY_API_KEY
-        return os.getenv("APIFY_API_TOKEN") or os.getenv("APIFY_API_KEY", default)
-    
-    env_key = f"{service_name}_API_KEY"
-    return os.getenv(env_key, default)
+    api_key = _API_KEY_CACHE.get(service_name)
+    if api_key is None:
+        api_key = _read_api_key(service_name)
+        if api_key is None:
+            return default
+        _API_KEY_CACHE[service_name] = api_key
+    return api_key
 
 
 def set_api_key(service_name: str, api_key: str) -> None:
@@ -42,6 +60,7 @@ def set_api_key(service_name: str, api_key: str) -> None:
     """
     env_key = f"{service_name}_API_KEY"
     os.environ[env_key] = api_key
+    _API_KEY_CACHE.pop(service_name, None)
 
 
 # Constantes pour les noms de services
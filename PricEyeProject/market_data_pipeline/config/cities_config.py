@@ -4,13 +4,27 @@ Configuration des villes à tracker pour les données météo.
 Contient les coordonnées (lat/long) et informations pour chaque ville.
 """
 
-from typing import Dict, Optional, List
+import math
+import sys
+from typing import Dict, Optional, List, Tuple
 from dataclasses import dataclass
 
+# Import conditionnel de numpy (recherche géographique vectorisée, fallback Python)
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
 
-@dataclass
+
+@dataclass(frozen=True)
 class CityConfig:
-    """Configuration d'une ville."""
+    """
+    Configuration d'une ville.
+    
+    Immuable : les instances sont partagées par les index (noms, coordonnées) ;
+    utiliser dataclasses.replace pour en dériver une variante.
+    """
     name: str
     country: str
     latitude: float
@@ -20,6 +34,11 @@ class CityConfig:
     # Informations additionnelles (optionnel)
     region: Optional[str] = None
     population: Optional[int] = None
+    
+    def __post_init__(self):
+        # Codes pays et fuseaux horaires très répétés : une seule chaîne partagée
+        object.__setattr__(self, 'country', sys.intern(self.country))
+        object.__setattr__(self, 'timezone', sys.intern(self.timezone))
 
 
 # Base de données des villes courantes
@@ -169,6 +188,78 @@ CITIES_DATABASE: Dict[str, Dict[str, CityConfig]] = {
 }
 
 
+# Index des noms de ville en minuscules, par pays (construits une fois, reconstruits
+# par add_city_config) : {pays: {nom_minuscule: config}} et {pays: ((nom_minuscule, config), ...)}
+CITIES_LOWER_INDEX: Dict[str, Dict[str, CityConfig]] = {}
+CITIES_LOWER_LIST: Dict[str, Tuple[Tuple[str, CityConfig], ...]] = {}
+# Résultats des recherches partielles déjà résolues {pays: {requête: config ou None}}
+_PARTIAL_MATCHES: Dict[str, Dict[str, Optional[CityConfig]]] = {}
+_PARTIAL_MATCHES_MAXSIZE = 1024
+
+
+def _index_country(country: str) -> None:
+    """(Re)construit les index en minuscules des villes d'un pays."""
+    lowered = tuple(
+        (city_name.lower(), config)
+        for city_name, config in CITIES_DATABASE[country].items()
+    )
+    exact: Dict[str, CityConfig] = {}
+    for city_lower, config in lowered:
+        # Premier nom rencontré prioritaire, comme le parcours du dict
+        exact.setdefault(city_lower, config)
+    CITIES_LOWER_INDEX[country] = exact
+    CITIES_LOWER_LIST[country] = lowered
+    _PARTIAL_MATCHES[country] = {}
+
+
+for _country in CITIES_DATABASE:
+    _index_country(_country)
+
+
+# Coordonnées de toutes les villes en colonnes contiguës (SoA), alignées sur _CITY_LIST
+_CITY_LIST: List[CityConfig] = []
+_LATS = None
+_LONS = None
+
+
+def _rebuild_geo_index() -> None:
+    """(Re)construit les tableaux de coordonnées utilisés par find_nearest_city."""
+    global _CITY_LIST, _LATS, _LONS
+    _CITY_LIST = get_all_cities()
+    if NUMPY_AVAILABLE:
+        count = len(_CITY_LIST)
+        _LATS = np.fromiter((c.latitude for c in _CITY_LIST), dtype=np.float32, count=count)
+        _LONS = np.fromiter((c.longitude for c in _CITY_LIST), dtype=np.float32, count=count)
+
+
+def find_nearest_city(latitude: float, longitude: float) -> Optional[CityConfig]:
+    """
+    Retourne la ville configurée la plus proche d'un point.
+    
+    Distance équirectangulaire (longitudes pondérées par cos(latitude)) : suffisante
+    pour départager des villes, calculée en une seule expression numpy.
+    
+    Args:
+        latitude: Latitude du point
+        longitude: Longitude du point
+    
+    Returns:
+        CityConfig la plus proche, ou None si aucune ville configurée
+    """
+    if not _CITY_LIST:
+        return None
+    
+    cos_lat = math.cos(math.radians(latitude))
+    if NUMPY_AVAILABLE:
+        distances = np.hypot(_LATS - latitude, (_LONS - longitude) * cos_lat)
+        return _CITY_LIST[int(np.argmin(distances))]
+    
+    return min(
+        _CITY_LIST,
+        key=lambda c: math.hypot(c.latitude - latitude, (c.longitude - longitude) * cos_lat)
+    )
+
+
 def get_city_config(city: str, country: str) -> Optional[CityConfig]:
     """
     Récupère la configuration d'une ville.
@@ -183,20 +274,30 @@ def get_city_config(city: str, country: str) -> Optional[CityConfig]:
     country_upper = country.upper()
     city_lower = city.lower().strip()
     
-    if country_upper not in CITIES_DATABASE:
+    exact = CITIES_LOWER_INDEX.get(country_upper)
+    if exact is None:
         return None
     
     # Recherche exacte
-    for city_name, config in CITIES_DATABASE[country_upper].items():
-        if city_name.lower() == city_lower:
-            return config
+    config = exact.get(city_lower)
+    if config is not None:
+        return config
+    
+    # Recherche partielle (mémoïsée : le parcours n'est fait qu'une fois par requête)
+    partial_matches = _PARTIAL_MATCHES[country_upper]
+    if city_lower in partial_matches:
+        return partial_matches[city_lower]
     
-    # Recherche partielle
-    for city_name, config in CITIES_DATABASE[country_upper].items():
-        if city_lower in city_name.lower() or city_name.lower() in city_lower:
-            return config
+    match = None
+    for city_name, config in CITIES_LOWER_LIST[country_upper]:
+        if city_lower in city_name or city_name in city_lower:
+            match = config
+            break
     
-    return None
+    if len(partial_matches) >= _PARTIAL_MATCHES_MAXSIZE:
+        partial_matches.clear()
+    partial_matches[city_lower] = match
+    return match
 
 
 def get_all_cities() -> List[CityConfig]:
@@ -219,14 +320,8 @@ def add_city_config(city_config: CityConfig) -> None:
         CITIES_DATABASE[country] = {}
     
     CITIES_DATABASE[country][city_config.name] = city_config
+    _index_country(country)
+    _rebuild_geo_index()
 
 
-
-
-
-
-
-
-
-
-
+_rebuild_geo_index()
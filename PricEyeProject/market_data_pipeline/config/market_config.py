@@ -4,15 +4,45 @@ Gestion de la configuration par pays pour le pipeline marché.
 
 import asyncio
 import logging
-from typing import Dict, List, Optional, Any
-from dataclasses import dataclass, asdict
+import sys
+import threading
+import weakref
+from functools import lru_cache
+from operator import attrgetter
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Dict, Iterable, List, Mapping, Optional, Any, Callable, Tuple
+from dataclasses import dataclass
 
+if TYPE_CHECKING:
+    from supabase import Client
+
+# Import paresseux de Supabase : le package (et ses dépendances postgrest, gotrue,
+# storage3, realtime...) n'est importé qu'au premier accès à la base, pas au
+# chargement du module (les lectures de DEFAULT_CONFIGS n'en ont pas besoin)
+_supabase_create_client: Optional[Callable[..., Any]] = None
+_supabase_import_failed = False
+
+
+def _get_supabase_create_client() -> Optional[Callable[..., Any]]:
+    """Retourne supabase.create_client (importé au premier appel), ou None si absent."""
+    global _supabase_create_client, _supabase_import_failed
+    
+    if _supabase_create_client is None and not _supabase_import_failed:
+        try:
+            from supabase import create_client
+            _supabase_create_client = create_client
+        except ImportError:
+            _supabase_import_failed = True
+            logging.warning("Supabase client not available")
+    
+    return _supabase_create_client
+
+# Import conditionnel d'httpx (lectures PostgREST asynchrones, sans thread pool)
 try:
-    from supabase import create_client, Client
-    SUPABASE_AVAILABLE = True
+    import httpx
+    HTTPX_AVAILABLE = True
 except ImportError:
-    SUPABASE_AVAILABLE = False
-    logging.warning("Supabase client not available")
+    HTTPX_AVAILABLE = False
 
 from .settings import Settings
 
@@ -222,10 +252,22 @@ DEFAULT_CONFIGS = {
 }
 
 
-@dataclass
+def _intern_value(value: Any) -> Any:
+    """Interne une chaîne (ou les chaînes d'une liste) ; autres valeurs inchangées."""
+    if isinstance(value, str):
+        return sys.intern(value)
+    if isinstance(value, list):
+        return [sys.intern(v) if isinstance(v, str) else v for v in value]
+    return value
+
+
+@dataclass(frozen=True)
 class MarketConfig:
     """
     Configuration de marché pour un pays donné.
+    
+    Immuable : une même instance est partagée par les caches (et les configs par
+    défaut sont construites une seule fois à l'import).
     """
     
     country: str
@@ -256,15 +298,125 @@ class MarketConfig:
     
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> "MarketConfig":
-        """Crée une instance depuis un dict."""
-        # Filtrer les clés valides
-        valid_keys = {f.name for f in cls.__dataclass_fields__.values()}
-        filtered_data = {k: v for k, v in data.items() if k in valid_keys}
+        """
+        Crée une instance depuis un dict.
+        
+        Les chaînes (codes pays, devises, sources API, langues) sont internées : les
+        configs chargées depuis la base partagent les mêmes objets que les littéraux
+        de DEFAULT_CONFIGS au lieu d'en allouer une copie par ligne.
+        """
+        # Filtrer les clés valides (intersection avec les noms de champs précalculés)
+        filtered_data = {
+            k: _intern_value(data[k])
+            for k in data.keys() & _MARKET_CONFIG_FIELDS
+        }
         return cls(**filtered_data)
     
     def to_dict(self) -> Dict[str, Any]:
-        """Convertit en dict."""
-        return asdict(self)
+        """
+        Convertit en dict.
+        
+        Copie superficielle (pas de deepcopy comme asdict) ; les listes sont copiées
+        pour ne pas exposer celles de l'instance partagée.
+        """
+        data = {}
+        for name in _MARKET_CONFIG_FIELD_ORDER:
+            value = getattr(self, name)
+            data[name] = list(value) if isinstance(value, list) else value
+        return data
+
+
+# Noms des champs de MarketConfig (calculés une fois, utilisés par from_dict / to_dict)
+_MARKET_CONFIG_FIELD_ORDER = tuple(MarketConfig.__dataclass_fields__)
+_MARKET_CONFIG_FIELDS = frozenset(_MARKET_CONFIG_FIELD_ORDER)
+
+
+# Accesseur (attrgetter, implémenté en C) de l'attribut de MarketConfig
+# par (type de données, source primaire ?)
+_API_SOURCE_GETTERS: Dict[Tuple[str, bool], Callable[["MarketConfig"], Optional[str]]] = {
+    (data_type, use_primary): attrgetter(
+        f"{data_type}_api_{'source' if use_primary else 'fallback'}"
+    )
+    for data_type in ('competitor', 'weather', 'events', 'news', 'trends')
+    for use_primary in (True, False)
+}
+
+
+# Configurations par défaut instanciées une fois à l'import
+DEFAULT_MARKET_CONFIGS: Dict[str, MarketConfig] = {
+    country: MarketConfig.from_dict({'country': country, **config})
+    for country, config in DEFAULT_CONFIGS.items()
+}
+
+
+@lru_cache(maxsize=None)
+def _resolve_default_config(country_upper: str) -> MarketConfig:
+    """
+    Configuration de repli d'un pays (sans config en base), partagée par tous les gestionnaires.
+    
+    Args:
+        country_upper: Code pays en majuscules
+        
+    Returns:
+        Configuration par défaut du pays, ou configuration minimale si inconnu
+    """
+    if country_upper in DEFAULT_MARKET_CONFIGS:
+        logger.info(f"Using default config for {country_upper}")
+        return DEFAULT_MARKET_CONFIGS[country_upper]
+    
+    # Si pas de config par défaut, créer une config minimale
+    logger.warning(f"No config found for {country_upper}, using minimal defaults")
+    return MarketConfig(
+        country=country_upper,
+        default_currency='EUR',
+        default_timezone='UTC',
+        primary_language='en',
+        supported_languages=['en']
+    )
+
+
+def _build_reverse_index(
+    keys_of: Callable[[MarketConfig], Iterable[str]]
+) -> Mapping[str, Tuple[str, ...]]:
+    """
+    Index inversé clé -> codes pays construit à partir de DEFAULT_MARKET_CONFIGS.
+    
+    Args:
+        keys_of: Clés d'indexation d'une config (devise, langues, fuseau...)
+    
+    Returns:
+        Vue en lecture seule {clé: (pays, ...)}, pays dans l'ordre de DEFAULT_CONFIGS
+    """
+    index: Dict[str, List[str]] = {}
+    for country, config in DEFAULT_MARKET_CONFIGS.items():
+        for key in keys_of(config):
+            countries = index.setdefault(key, [])
+            if country not in countries:
+                countries.append(country)
+    return MappingProxyType({key: tuple(countries) for key, countries in index.items()})
+
+
+# Index inversés des configurations par défaut (construits une fois à l'import)
+_BY_CURRENCY = _build_reverse_index(lambda config: (config.default_currency,))
+_BY_LANGUAGE = _build_reverse_index(
+    lambda config: (config.primary_language, *config.supported_languages)
+)
+_BY_TIMEZONE = _build_reverse_index(lambda config: (config.default_timezone,))
+
+
+def countries_for_currency(currency: str) -> Tuple[str, ...]:
+    """Codes pays dont la devise par défaut est `currency` (ex: 'EUR')."""
+    return _BY_CURRENCY.get(currency.upper(), ())
+
+
+def countries_for_language(language: str) -> Tuple[str, ...]:
+    """Codes pays supportant la langue `language` (ex: 'fr')."""
+    return _BY_LANGUAGE.get(language.lower(), ())
+
+
+def countries_for_timezone(timezone: str) -> Tuple[str, ...]:
+    """Codes pays dont le fuseau horaire par défaut est `timezone` (ex: 'Europe/Paris')."""
+    return _BY_TIMEZONE.get(timezone, ())
 
 
 class MarketConfigManager:
@@ -282,20 +434,28 @@ class MarketConfigManager:
             settings: Configuration globale (si None, charge depuis env)
         """
         self.settings = settings or Settings.from_env()
-        self._supabase_client: Optional[Client] = None
-        self._cache: Dict[str, MarketConfig] = {}
+        self._supabase_client: Optional["Client"] = None
+        # Clients HTTP PostgREST par event loop (leur pool de connexions est lié au loop) :
+        # l'entrée disparaît avec son loop, aucun client n'est écrasé sans être fermé
+        self._http_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+            weakref.WeakKeyDictionary()
+        )
+        # Cache copy-on-write : les lectures voient un snapshot immuable (aucun verrou),
+        # les écritures construisent un nouveau dict sous _cache_lock puis le publient
+        self._cache: Mapping[str, MarketConfig] = MappingProxyType({})
+        self._cache_lock = threading.Lock()
         
         logger.info("Initialized MarketConfigManager")
     
-    def _get_supabase_client(self) -> Optional[Client]:
-        """Récupère le client Supabase (lazy init)."""
-        if not SUPABASE_AVAILABLE:
-            return None
-        
+    def _get_supabase_client(self) -> Optional["Client"]:
+        """Récupère le client Supabase (lazy init, import de supabase compris)."""
         if not self.settings.supabase_url or not self.settings.supabase_key:
             return None
         
         if self._supabase_client is None:
+            create_client = _get_supabase_create_client()
+            if create_client is None:
+                return None
             self._supabase_client = create_client(
                 self.settings.supabase_url,
                 self.settings.supabase_key
@@ -303,6 +463,95 @@ class MarketConfigManager:
         
         return self._supabase_client
     
+    def _cache_update(self, configs: Dict[str, MarketConfig]) -> None:
+        """Publie un nouveau snapshot du cache contenant `configs` (copy-on-write)."""
+        if not configs:
+            return
+        with self._cache_lock:
+            self._cache = MappingProxyType({**self._cache, **configs})
+    
+    def _cache_discard(self, country_upper: str) -> None:
+        """Publie un nouveau snapshot du cache sans `country_upper`."""
+        with self._cache_lock:
+            if country_upper in self._cache:
+                cache = dict(self._cache)
+                del cache[country_upper]
+                self._cache = MappingProxyType(cache)
+    
+    def _get_http_client(self) -> Optional["httpx.AsyncClient"]:
+        """Récupère le client HTTP PostgREST (lazy init), ou None si indisponible."""
+        if not HTTPX_AVAILABLE:
+            return None
+        
+        if not self.settings.supabase_url or not self.settings.supabase_key:
+            return None
+        
+        # Le pool de connexions est lié à l'event loop : un client par loop
+        loop = asyncio.get_running_loop()
+        http_client = self._http_clients.get(loop)
+        if http_client is None or http_client.is_closed:
+            key = self.settings.supabase_key
+            http_client = httpx.AsyncClient(
+                base_url=f"{self.settings.supabase_url.rstrip('/')}/rest/v1",
+                headers={'apikey': key, 'Authorization': f'Bearer {key}'},
+                timeout=10.0
+            )
+            self._http_clients[loop] = http_client
+        
+        return http_client
+    
+    async def aclose(self) -> None:
+        """
+        Ferme le client HTTP PostgREST de l'event loop courant.
+        
+        Les clients d'event loops déjà fermés sont oubliés (leur pool est libéré avec eux).
+        """
+        http_client = self._http_clients.pop(asyncio.get_running_loop(), None)
+        if http_client is not None:
+            await http_client.aclose()
+        for loop in [loop for loop in self._http_clients if loop.is_closed()]:
+            del self._http_clients[loop]
+    
+    async def _select_configs(self, countries: List[str]) -> Optional[List[Dict[str, Any]]]:
+        """
+        Lit les lignes market_config des pays demandés.
+        
+        Passe par l'API PostgREST avec httpx (directement sur l'event loop, sans
+        thread du pool) ; à défaut, par le client Supabase synchrone dans un executor.
+        
+        Args:
+            countries: Codes pays en majuscules
+            
+        Returns:
+            Lignes trouvées, ou None si aucune base n'est configurée
+        """
+        http_client = self._get_http_client()
+        if http_client is not None:
+            country_filter = (
+                f"eq.{countries[0]}" if len(countries) == 1
+                else f"in.({','.join(countries)})"
+            )
+            response = await http_client.get(
+                '/market_config',
+                params={'select': '*', 'country': country_filter}
+            )
+            response.raise_for_status()
+            return response.json()
+        
+        supabase_client = self._get_supabase_client()
+        if supabase_client is None:
+            return None
+        
+        loop = asyncio.get_running_loop()
+        response = await loop.run_in_executor(
+            None,
+            lambda: supabase_client.table('market_config')
+                .select('*')
+                .in_('country', countries)
+                .execute()
+        )
+        return response.data or []
+    
     async def get_config(self, country: str) -> MarketConfig:
         """
         Récupère la configuration pour un pays.
@@ -316,54 +565,68 @@ class MarketConfigManager:
         country_upper = country.upper()
         
         # Vérifier le cache
-        if country_upper in self._cache:
-            return self._cache[country_upper]
+        config = self._cache.get(country_upper)
+        if config is not None:
+            return config
         
         # Essayer de charger depuis Supabase
-        supabase_client = self._get_supabase_client()
-        if supabase_client:
+        try:
+            rows = await self._select_configs([country_upper])
+            
+            if rows:
+                config = MarketConfig.from_dict(rows[0])
+                self._cache_update({country_upper: config})
+                logger.info(f"Loaded market config for {country_upper} from database")
+                return config
+        
+        except Exception as e:
+            logger.warning(f"Error loading config from database for {country_upper}: {e}")
+        
+        # Fallback vers configuration par défaut (ou minimale)
+        config = _resolve_default_config(country_upper)
+        self._cache_update({country_upper: config})
+        return config
+    
+    async def warm_cache(self, countries: Optional[List[str]] = None) -> int:
+        """
+        Précharge en une seule requête les configurations de plusieurs pays.
+        
+        Les pays absents de la base reçoivent leur configuration par défaut : après
+        l'appel, get_config/get_config_sync ne font plus que des lectures de cache.
+        
+        Args:
+            countries: Codes pays à charger (si None, tous les pays de DEFAULT_CONFIGS)
+            
+        Returns:
+            Nombre de configurations chargées depuis la base
+        """
+        countries_upper = [c.upper() for c in (countries or DEFAULT_CONFIGS)]
+        loaded = 0
+        
+        if countries_upper:
             try:
-                loop = asyncio.get_event_loop()
-                
-                response = await loop.run_in_executor(
-                    None,
-                    lambda: supabase_client.table('market_config')
-                        .select('*')
-                        .eq('country', country_upper)
-                        .maybe_single()
-                        .execute()
-                )
-                
-                if response.data:
-                    config = MarketConfig.from_dict(response.data)
-                    self._cache[country_upper] = config
-                    logger.info(f"Loaded market config for {country_upper} from database")
-                    return config
+                loaded_configs = {}
+                for row in await self._select_configs(countries_upper) or []:
+                    config = MarketConfig.from_dict(row)
+                    loaded_configs[config.country.upper()] = config
+                self._cache_update(loaded_configs)
+                loaded = len(loaded_configs)
             
             except Exception as e:
-                logger.warning(f"Error loading config from database for {country_upper}: {e}")
+                logger.warning(f"Error warming market config cache from database: {e}")
         
-        # Fallback vers configuration par défaut
-        if country_upper in DEFAULT_CONFIGS:
-            config = MarketConfig.from_dict({
-                'country': country_upper,
-                **DEFAULT_CONFIGS[country_upper]
-            })
-            self._cache[country_upper] = config
-            logger.info(f"Using default config for {country_upper}")
-            return config
+        cache = self._cache
+        self._cache_update({
+            country_upper: _resolve_default_config(country_upper)
+            for country_upper in countries_upper
+            if country_upper not in cache
+        })
         
-        # Si pas de config par défaut, créer une config minimale
-        logger.warning(f"No config found for {country_upper}, using minimal defaults")
-        config = MarketConfig(
-            country=country_upper,
-            default_currency='EUR',
-            default_timezone='UTC',
-            primary_language='en',
-            supported_languages=['en']
+        logger.info(
+            f"Warmed market config cache for {len(countries_upper)} countries "
+            f"({loaded} from database)"
         )
-        self._cache[country_upper] = config
-        return config
+        return loaded
     
     def get_config_sync(self, country: str) -> MarketConfig:
         """
@@ -378,8 +641,9 @@ class MarketConfigManager:
         country_upper = country.upper()
         
         # Vérifier le cache
-        if country_upper in self._cache:
-            return self._cache[country_upper]
+        config = self._cache.get(country_upper)
+        if config is not None:
+            return config
         
         # Essayer de charger depuis Supabase (synchrone)
         supabase_client = self._get_supabase_client()
@@ -393,33 +657,16 @@ class MarketConfigManager:
                 
                 if response.data:
                     config = MarketConfig.from_dict(response.data)
-                    self._cache[country_upper] = config
+                    self._cache_update({country_upper: config})
                     logger.info(f"Loaded market config for {country_upper} from database")
                     return config
             
             except Exception as e:
                 logger.warning(f"Error loading config from database for {country_upper}: {e}")
         
-        # Fallback vers configuration par défaut
-        if country_upper in DEFAULT_CONFIGS:
-            config = MarketConfig.from_dict({
-                'country': country_upper,
-                **DEFAULT_CONFIGS[country_upper]
-            })
-            self._cache[country_upper] = config
-            logger.info(f"Using default config for {country_upper}")
-            return config
-        
-        # Si pas de config par défaut, créer une config minimale
-        logger.warning(f"No config found for {country_upper}, using minimal defaults")
-        config = MarketConfig(
-            country=country_upper,
-            default_currency='EUR',
-            default_timezone='UTC',
-            primary_language='en',
-            supported_languages=['en']
-        )
-        self._cache[country_upper] = config
+        # Fallback vers configuration par défaut (ou minimale)
+        config = _resolve_default_config(country_upper)
+        self._cache_update({country_upper: config})
         return config
     
     def get_api_source(
@@ -441,32 +688,8 @@ class MarketConfigManager:
         """
         config = self.get_config_sync(country)
         
-        data_type_lower = data_type.lower()
-        
-        if use_primary:
-            if data_type_lower == 'competitor':
-                return config.competitor_api_source
-            elif data_type_lower == 'weather':
-                return config.weather_api_source
-            elif data_type_lower == 'events':
-                return config.events_api_source
-            elif data_type_lower == 'news':
-                return config.news_api_source
-            elif data_type_lower == 'trends':
-                return config.trends_api_source
-        else:
-            if data_type_lower == 'competitor':
-                return config.competitor_api_fallback
-            elif data_type_lower == 'weather':
-                return config.weather_api_fallback
-            elif data_type_lower == 'events':
-                return config.events_api_fallback
-            elif data_type_lower == 'news':
-                return config.news_api_fallback
-            elif data_type_lower == 'trends':
-                return config.trends_api_fallback
-        
-        return None
+        getter = _API_SOURCE_GETTERS.get((data_type.lower(), bool(use_primary)))
+        return getter(config) if getter else None
     
     async def update_config(
         self,
@@ -489,7 +712,7 @@ class MarketConfigManager:
             return False
         
         try:
-            loop = asyncio.get_event_loop()
+            loop = asyncio.get_running_loop()
             
             # Upsert la configuration
             response = await loop.run_in_executor(
@@ -503,8 +726,7 @@ class MarketConfigManager:
             )
             
             # Invalider le cache
-            if country.upper() in self._cache:
-                del self._cache[country.upper()]
+            self._cache_discard(country.upper())
             
             logger.info(f"Updated market config for {country.upper()}")
             return True
@@ -515,12 +737,16 @@ class MarketConfigManager:
     
     def clear_cache(self):
         """Vide le cache de configuration."""
-        self._cache.clear()
+        with self._cache_lock:
+            self._cache = MappingProxyType({})
+        _resolve_default_config.cache_clear()
         logger.info("Cleared market config cache")
 
 
 # Instance globale (singleton)
 _manager_instance: Optional[MarketConfigManager] = None
+# Verrou pris uniquement à la création (les lectures de l'instance n'en prennent pas)
+_manager_lock = threading.Lock()
 
 
 def get_market_config_manager(settings: Optional[Settings] = None) -> MarketConfigManager:
@@ -536,7 +762,10 @@ def get_market_config_manager(settings: Optional[Settings] = None) -> MarketConf
     global _manager_instance
     
     if _manager_instance is None:
-        _manager_instance = MarketConfigManager(settings)
+        with _manager_lock:
+            # Double vérification : un autre thread a pu créer l'instance entre-temps
+            if _manager_instance is None:
+                _manager_instance = MarketConfigManager(settings)
     
     return _manager_instance
 
@@ -5,6 +5,7 @@ Ces configurations peuvent être personnalisées selon les quotas réels de chaq
 """
 
 import logging
+from functools import lru_cache
 from market_data_pipeline.collectors.rate_limiter import RateLimitConfig
 
 logger = logging.getLogger(__name__)
@@ -85,10 +86,22 @@ RATE_LIMIT_CONFIGS = {
 }
 
 
+# Snapshot (clé, config) pour la recherche partielle : parcours d'un tuple, pas d'un dict.
+# Trié par longueur de clé décroissante : la première clé trouvée est la plus longue
+# (ex: "apify_actor" préférée à "apify")
+RATE_LIMIT_CONFIG_ITEMS = tuple(
+    sorted(RATE_LIMIT_CONFIGS.items(), key=lambda item: len(item[0]), reverse=True)
+)
+
+
+@lru_cache(maxsize=256)
 def get_rate_limit_config(source_name: str) -> RateLimitConfig:
     """
     Retourne la configuration de rate limit pour une source donnée.
     
+    Mémoïsée par nom de source (ensemble petit et borné). Après modification de
+    RATE_LIMIT_CONFIGS, appeler get_rate_limit_config.cache_clear().
+    
     Args:
         source_name: Nom de la source API (en minuscules)
         
@@ -101,8 +114,9 @@ def get_rate_limit_config(source_name: str) -> RateLimitConfig:
     if source_lower in RATE_LIMIT_CONFIGS:
         return RATE_LIMIT_CONFIGS[source_lower]
     
-    # Rechercher une correspondance partielle (ex: "competitor_airdna" -> "airdna")
-    for config_key, config in RATE_LIMIT_CONFIGS.items():
+    # Rechercher une correspondance partielle, clé la plus longue d'abord
+    # (ex: "competitor_airdna" -> "airdna", "apify_actor_run" -> "apify_actor")
+    for config_key, config in RATE_LIMIT_CONFIG_ITEMS:
         if config_key in source_lower:
             return config
     
@@ -2,18 +2,73 @@
 Configuration générale du pipeline.
 """
 
+import logging
 import os
-from typing import List, Optional
+from functools import lru_cache
+from typing import Any, Callable, Dict, FrozenSet, Optional, Tuple
 from dataclasses import dataclass
 from dotenv import load_dotenv
 from pathlib import Path
 
+logger = logging.getLogger(__name__)
+
 # Charger .env depuis le répertoire du projet (PricEyeProject/)
 project_root = Path(__file__).parent.parent.parent
-load_dotenv(dotenv_path=project_root / ".env")
+_DOTENV_PATH = project_root / ".env"
+# Date de modification du .env lors du dernier chargement (None = jamais chargé)
+_dotenv_mtime: Optional[float] = None
+
+
+def _ensure_dotenv() -> None:
+    """Charge le .env s'il n'a pas encore été lu ou s'il a changé depuis le dernier chargement."""
+    global _dotenv_mtime
+    try:
+        mtime = _DOTENV_PATH.stat().st_mtime
+    except FileNotFoundError:
+        return
+    if mtime != _dotenv_mtime:
+        load_dotenv(dotenv_path=_DOTENV_PATH)
+        _dotenv_mtime = mtime
+
+
+_ensure_dotenv()
+
+
+_TRUE_VALUES = frozenset({"1", "true", "yes", "on"})
+_FALSE_VALUES = frozenset({"0", "false", "no", "off"})
+
+
+def _parse_bool(value: str) -> bool:
+    """Convertit une valeur d'environnement ('true', '0', 'yes'...) en booléen."""
+    lowered = value.strip().lower()
+    if lowered in _TRUE_VALUES:
+        return True
+    if lowered in _FALSE_VALUES:
+        return False
+    raise ValueError(f"invalid boolean: {value!r}")
+
+
+# Préfixe des variables d'environnement des champs typés (évite les collisions avec
+# des variables génériques comme MAX_RETRIES posées par d'autres outils)
+_TYPED_ENV_PREFIX = "PRICEYE_"
+
+# Champs typés de Settings surchargeables par l'environnement
+# (variable = _TYPED_ENV_PREFIX + nom du champ en majuscules) et leur convertisseur
+_TYPED_ENV_FIELDS: Tuple[Tuple[str, Callable[[str], Any]], ...] = (
+    ("collect_competitors", _parse_bool),
+    ("collect_weather", _parse_bool),
+    ("collect_events", _parse_bool),
+    ("collect_news", _parse_bool),
+    ("collect_trends", _parse_bool),
+    ("default_rate_limit_per_minute", int),
+    ("default_rate_limit_per_hour", int),
+    ("max_retries", int),
+    ("retry_backoff_factor", float),
+    ("log_to_file", _parse_bool),
+)
 
 
-@dataclass
+@dataclass(frozen=True)
 class DatabaseConfig:
     """Configuration de la base de données Supabase."""
     url: str
@@ -21,9 +76,14 @@ class DatabaseConfig:
     timeout: int = 30
 
 
-@dataclass
+@dataclass(frozen=True)
 class Settings:
-    """Configuration globale du pipeline."""
+    """
+    Configuration globale du pipeline.
+    
+    Immuable : l'instance de from_env est partagée par tous les composants ;
+    utiliser dataclasses.replace pour en dériver une variante.
+    """
     
     # Base de données
     supabase_url: str
@@ -35,9 +95,10 @@ class Settings:
     # Timezone par défaut
     default_timezone: str = "UTC"
     
-    # Pays et villes à traiter (vide = tous)
-    target_countries: Optional[List[str]] = None
-    target_cities: Optional[List[str]] = None
+    # Pays et villes à traiter (vide = tous) ; normalisés en frozenset par __post_init__
+    # (codes pays en majuscules, villes en minuscules) pour des tests d'appartenance en O(1)
+    target_countries: Optional[FrozenSet[str]] = None
+    target_cities: Optional[FrozenSet[str]] = None
     
     # Configuration des jobs
     collect_competitors: bool = False  # DÉSACTIVÉ temporairement - scraping désactivé
@@ -59,14 +120,62 @@ class Settings:
     log_to_file: bool = False
     log_file_path: str = "logs/market_data_pipeline.log"
     
+    def __post_init__(self):
+        object.__setattr__(
+            self, 'target_countries',
+            frozenset(c.upper() for c in self.target_countries) if self.target_countries else None
+        )
+        object.__setattr__(
+            self, 'target_cities',
+            frozenset(c.lower() for c in self.target_cities) if self.target_cities else None
+        )
+    
     @classmethod
     def from_env(cls) -> "Settings":
-        """Crée une instance Settings depuis les variables d'environnement."""
-        return cls(
-            supabase_url=os.getenv("SUPABASE_URL", ""),
-            supabase_key=os.getenv("SUPABASE_SERVICE_ROLE_KEY", os.getenv("SUPABASE_KEY", "")),
-            base_currency=os.getenv("BASE_CURRENCY", "EUR"),
-            default_timezone=os.getenv("DEFAULT_TIMEZONE", "UTC"),
-            log_level=os.getenv("LOG_LEVEL", "INFO"),
-        )
+        """
+        Retourne l'instance Settings construite depuis les variables d'environnement.
+        
+        L'environnement n'est lu qu'au premier appel : les appels suivants (un par
+        collecteur, enrichisseur, job...) partagent la même instance.
+        Utiliser clear_cache() pour forcer une relecture.
+        """
+        return _settings_from_env(cls)
+    
+    @classmethod
+    def clear_cache(cls) -> None:
+        """Oublie l'instance mise en cache par from_env (relecture au prochain appel)."""
+        _settings_from_env.cache_clear()
+
+
+@lru_cache(maxsize=None)
+def _settings_from_env(cls: type) -> Settings:
+    """Construit une instance de `cls` depuis les variables d'environnement (une fois par classe)."""
+    _ensure_dotenv()
+    env = os.environ
+    # SUPABASE_KEY n'est lue qu'en l'absence de la clé service role
+    supabase_key = env.get("SUPABASE_SERVICE_ROLE_KEY")
+    if supabase_key is None:
+        supabase_key = env.get("SUPABASE_KEY", "")
+    
+    # Champs typés : convertis et validés ici, une seule fois (défaut si absents, vides
+    # ou invalides : une valeur erronée ne doit pas empêcher la création des composants)
+    typed_fields: Dict[str, Any] = {}
+    for field_name, parse in _TYPED_ENV_FIELDS:
+        env_name = _TYPED_ENV_PREFIX + field_name.upper()
+        raw_value = env.get(env_name)
+        if not raw_value:
+            continue
+        try:
+            typed_fields[field_name] = parse(raw_value)
+        except ValueError:
+            logger.warning(f"Ignoring invalid value for {env_name}: {raw_value!r}, using default")
+    
+    return cls(
+        supabase_url=env.get("SUPABASE_URL", ""),
+        supabase_key=supabase_key,
+        base_currency=env.get("BASE_CURRENCY", "EUR"),
+        default_timezone=env.get("DEFAULT_TIMEZONE", "UTC"),
+        log_level=env.get("LOG_LEVEL", "INFO"),
+        **typed_fields,
+    )
 
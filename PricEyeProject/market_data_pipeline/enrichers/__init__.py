@@ -1,9 +1,22 @@
 """Enrichers module for market data pipeline."""
 
-from .similarity_engine import SimilarityEngine
-from .nlp_pipeline import NLPPipeline
-from .time_series_analyzer import TimeSeriesAnalyzer
-from .feature_calculator import FeatureCalculator
+import importlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .similarity_engine import SimilarityEngine
+    from .nlp_pipeline import NLPPipeline
+    from .time_series_analyzer import TimeSeriesAnalyzer
+    from .feature_calculator import FeatureCalculator
+
+# Import paresseux (PEP 562) : chaque enrichisseur (et ses dépendances lourdes :
+# spaCy, transformers, sklearn, pandas...) n'est chargé qu'au premier accès
+_LAZY_SUBMODULES = {
+    "SimilarityEngine": "similarity_engine",
+    "NLPPipeline": "nlp_pipeline",
+    "TimeSeriesAnalyzer": "time_series_analyzer",
+    "FeatureCalculator": "feature_calculator",
+}
 
 __all__ = [
     "SimilarityEngine",
@@ -12,3 +25,16 @@ __all__ = [
     "FeatureCalculator",
 ]
 
+
+def __getattr__(name: str):
+    submodule = _LAZY_SUBMODULES.get(name)
+    if submodule is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{submodule}", __name__), name)
+    # Mis en cache dans le module : les accès suivants ne repassent plus par __getattr__
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_SUBMODULES))
@@ -1,10 +1,12 @@
 """Utils module for market data pipeline."""
 
+from .cache import TTLCache
 from .currency_converter import CurrencyConverter
 from .timezone_handler import TimezoneHandler
 from .validators import validate_data, validate_schema
 
 __all__ = [
+    "TTLCache",
     "CurrencyConverter",
     "TimezoneHandler",
     "validate_data",
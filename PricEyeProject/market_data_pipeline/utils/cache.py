@@ -0,0 +1,75 @@
+"""
+Cache mémoire à expiration (TTL) pour les résultats d'API.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+# Sentinelle distinguant une entrée absente d'une valeur None mise en cache
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    Cache clé -> valeur dont les entrées expirent après `ttl` secondes.
+    
+    Borné à `maxsize` entrées : au-delà, l'entrée la plus ancienne est évincée.
+    Les expirations reposent sur `time.monotonic()` (insensible aux sauts d'horloge).
+    """
+    
+    def __init__(self, maxsize: int = 256, ttl: float = 3600.0):
+        """
+        Initialise le cache.
+        
+        Args:
+            maxsize: Nombre maximum d'entrées conservées
+            ttl: Durée de vie d'une entrée (secondes)
+        """
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        # {clé: (instant d'expiration, valeur)}, dans l'ordre d'insertion
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+    
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Retourne la valeur associée à `key`, ou `default` si absente ou expirée."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return default
+        return value
+    
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        Enregistre `value` pour `key`.
+        
+        Args:
+            key: Clé (hashable)
+            value: Valeur à mettre en cache
+            ttl: Durée de vie spécifique (si None, utilise self.ttl)
+        """
+        entries = self._entries
+        entries.pop(key, None)
+        entries[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        while len(entries) > self.maxsize:
+            entries.popitem(last=False)
+    
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def invalidate(self, key: Hashable) -> None:
+        """Supprime l'entrée `key` si elle existe."""
+        self._entries.pop(key, None)
+    
+    def clear(self) -> None:
+        """Vide le cache."""
+        self._entries.clear()
+